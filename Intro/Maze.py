@@ -1,40 +1,72 @@
-from PIL import Image, ImageDraw
+from PIL import Image
+from array import array
+from collections import OrderedDict, deque
+import argparse
+import bisect
+import heapq
+import itertools
+import json
+import mmap
+import multiprocessing
+import multiprocessing.connection
+import os
+import re
+import sys
+import time
+import zlib
 
-class Node():
-    def __init__(self, state, parent, action):
-        self.state = state
-        self.parent = parent
-        self.action = action
+# Moves a cell can make, the index of a move is what the search stores per cell
+ACTIONS = ("up", "down", "left", "right")
+START = len(ACTIONS) # move stored for the start cell, which has no parent
+
+INFINITY = float("inf")
+
+# Number of goal sets whose distance fields a maze keeps, least recently used go first
+DISTANCE_FIELDS = 4
+
+# Side of the square clusters HierarchicalIndex cuts a maze into
+CLUSTER_SIZE = 16
+
+# First bytes of a HierarchicalIndex file, and the arrays it holds with their types
+HPA_MAGIC = b"MAZEHPA1"
+HPA_ARRAYS = {"nodes": "q", "offsets": "q", "targets": "q", "costs": "i"}
+
+# Algorithms maze.solve knows
+ALGORITHMS = ("bfs", "dfs", "astar", "greedy", "dijkstra", "bidirectional", "jps")
+
+# Characters of a maze file that are open cells, a digit 1-9 is an open cell
+# that costs that much to move into, every other cell costs 1
+OPEN_CHARS = " AB123456789"
+
+# Maps every byte of a maze file to 1 (wall) or 0 (open), used with bytes.translate
+WALL_BYTES = bytes(0 if chr(byte) in OPEN_CHARS else 1 for byte in range(256))
+
+# Maps every byte of a maze file to the cost of moving into it (0 for walls)
+COST_BYTES = bytes(
+    int(chr(byte)) if chr(byte) in "123456789" else 1 if chr(byte) in OPEN_CHARS else 0
+    for byte in range(256)
+)
+
+# Bytes of a maze file converted at a time by maze.load
+LOAD_CHUNK = 1 << 20
+
+# Bytes that make maze.load read a file as text: non-ASCII ones, and the ASCII
+# characters other than \n and \r that str.splitlines ends lines at
+LINE_BREAKS = re.compile(rb"[\x0b\x0c\x1c-\x1e\x80-\xff]")
+
+# Maps a byte of the walls bytearray to the character that prints it
+WALL_CHARS = {0: " ", 1: "█"}
 
 class StackFrontier():
 
-    '''StackFrontier class to store the nodes in the frontier
+    '''StackFrontier class to store the cell ids in the frontier
        first in last out'''
     
     def __init__(self):
         self.frontier = []
 
-
-    def a_star(self, goal, steps):
-
-        # Initialize the a_starval list
-        self.a_starval = []
-
-        for x in range (len(self.frontier)):
-            # Manhattan distance
-            self.manhattan =  abs(self.frontier[x].state[0] - goal[0]) + abs(self.frontier[x].state[1] - goal[1])
-            self.a_starval.append(self.manhattan + steps)
-        # print(self.manhattan, self.steps)
-        # print(self.a_starval)
-        print(max(self.a_starval))
-        return (max(self.a_starval))   
-    
-    def add(self, node):
-        self.frontier.append(node)
-    
-    def contains_state(self, state):
-        # check if the state given from the parameter is equal to the state of the node ("node.state") from the frontier list
-        return any(node.state == state for node in self.frontier)
+    def add(self, cell, move, cost):
+        self.frontier.append((cell, move, cost))
     
     def empty(self):
         return len(self.frontier) == 0
@@ -43,286 +75,1214 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1] # get the last node from the list
-            self.frontier = self.frontier[:-1] # update the list by removing the last node
-            return node
+            return self.frontier.pop() # remove and return the last entry
         
 class queueFrontier(StackFrontier):
     
-    '''QueueFrontier class to store the nodes in the frontier
+    '''QueueFrontier class to store the cell ids in the frontier
        first in first out'''
+
+    def __init__(self):
+        self.frontier = deque()
     
     def remove(self):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0] # get the first node from the list
-            self.frontier = self.frontier[1:] # update the list by removing the first node
-            return node
+            return self.frontier.popleft() # remove and return the first entry
+
+
+class BucketFrontier(StackFrontier):
+
+    '''BucketFrontier class to store the cell ids in the frontier
+       lowest cost first, for whole number move costs up to max_cost
+
+       This is Dial's bucket queue: everything queued costs between the
+       cheapest entry and max_cost more than it, so max_cost + 1 buckets
+       used round robin keep the entries sorted without a heap.'''
+
+    def __init__(self, max_cost):
+        self.buckets = [[] for _ in range(max_cost + 1)] # cost % len(buckets) -> entries
+        self.current = 0 # cost of the bucket being emptied
+        self.count = 0
+
+    def add(self, cell, move, cost):
+        self.buckets[cost % len(self.buckets)].append((cell, move, cost))
+        self.count += 1
+
+    def empty(self):
+        return self.count == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            while not self.buckets[self.current % len(self.buckets)]:
+                self.current += 1
+            self.count -= 1
+            return self.buckets[self.current % len(self.buckets)].pop()
+
+
+class PriorityFrontier(StackFrontier):
+
+    '''PriorityFrontier class to store the cell ids in the frontier
+       lowest priority first, priority given by the key function'''
+
+    def __init__(self, key):
+        self.key = key # function mapping (cell, cost) to its priority
+        self.frontier = [] # heap of (priority, counter, cell, move, cost)
+        self.counter = itertools.count() # tie breaker, first added wins
+
+    def add(self, cell, move, cost):
+        heapq.heappush(self.frontier, (self.key(cell, cost), next(self.counter), cell, move, cost))
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            _, _, cell, move, cost = heapq.heappop(self.frontier)
+            return cell, move, cost
+
+
+def line_chunks(contents, size=LOAD_CHUNK):
+    """Yields the lines of contents (bytes or an mmap of ASCII text), split
+    like bytes.splitlines splits them, in lists of about size bytes of lines."""
+    position = 0
+    while position < len(contents):
+        end = position + size
+        if end < len(contents):
+            # Cut after the last line end in the chunk, or after the first one
+            # past it for a line longer than the chunk
+            cut = max(contents.rfind(b"\n", position, end), contents.rfind(b"\r", position, end))
+            if cut == -1:
+                ends = [found for found in (contents.find(b"\n", end), contents.find(b"\r", end)) if found != -1]
+                cut = min(ends, default=len(contents) - 1)
+
+            # Keep a \r\n line end in one piece
+            if contents[cut:cut + 2] == b"\r\n":
+                cut += 1
+            end = cut + 1
+        yield contents[position:end].splitlines()
+        position = end
 
 
 class maze():
     def __init__(self, filename):
 
-        # Read the maze from a file and set the height and width
-        with open(filename) as f:
-            contents = f.read()
+        # Read the maze from a file and set the height, width, walls, start and goal
+        self.load(filename)
+
+        '''example of the maze translated to the walls bytearray (width 7)
+
+        #####B#              1 1 1 1 1 0 1
+        ##### #              1 1 1 1 1 0 1
+        ####  #              1 1 1 1 0 0 1
+        #### ##      -->     1 1 1 1 0 1 1
+             ##              0 0 0 0 0 1 1
+        A######              0 1 1 1 1 1 1
+
+        the cell (i, j) is stored at index i * width + j, its cell id
+        '''
+
+        # Offset to add to a cell id for each move in ACTIONS
+        self.offsets = (-self.width, self.width, -1, 1)
+
+        self.solution = None
+
+        # Cached BFS distance fields, goal cell ids -> distances, see distance_field
+        self.distance_fields = OrderedDict()
+
+    def load(self, filename):
+        """Reads a maze file into the walls bytearray.
+
+        The file is memory-mapped and converted a chunk of lines at a time,
+        each chunk into its rows of walls with one bytes.translate call, so the
+        file never has to be held in memory as text. Lines end wherever
+        str.splitlines ends them, as when the file was read as text.
+        """
+        with open(filename, "rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                contents = b""
+            else:
+                contents = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            starts, goals = self.read_walls(contents)
+        finally:
+            if isinstance(contents, mmap.mmap):
+                contents.close()
 
-        # Validate start and goal 
-        if contents.count("A") != 1:
+        # Validate start and goal
+        if starts != 1:
             raise Exception("maze must have exactly one start point")
-        if contents.count("B") != 1:
+        if goals != 1:
             raise Exception("maze must have exactly one goal")
-        
+
+    def read_walls(self, contents):
+        """Sets height, width, walls, costs, start and goal from the bytes of a
+        maze file, and returns how many starts and goals it has."""
+
+        # A non-ASCII character is one cell but several bytes, and str.splitlines
+        # also ends lines at a few ASCII control characters bytes.splitlines keeps,
+        # so such files are read as text, with "?" (a wall) for non-ASCII characters
+        if LINE_BREAKS.search(contents):
+            text = bytes(contents).decode("utf-8", errors="replace")
+            contents = b"".join(line.encode("ascii", errors="replace") + b"\n" for line in text.splitlines())
+
         # Determine height and width of maze
-        contents = contents.splitlines() # split the contents into lines
-        self.height = len(contents)
-        self.width = max(len(line) for line in contents) # get the maximum length (char) of the lines
+        self.height = self.width = 0
+        for lines in line_chunks(contents):
+            self.height += len(lines)
+            self.width = max(self.width, max(map(len, lines), default=0)) # the longest line
+        self.size = self.height * self.width
 
-        # Keep track of walls
-        self.walls = []
-        for i in range(self.height):
-            row = []
-            for j in range(self.width):
-                try:
-                    # (i, j) is (x, y) coordinate
-                    if contents[i][j] == "A":
-                        self.start = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == "B":
-                        self.goal = (i, j)
-                        row.append(False)
-                    elif contents[i][j] == " ":
-                        row.append(False)
-                    else:
-                        row.append(True)
-                except IndexError:
-                    row.append(False)
-            self.walls.append(row)
-
-        '''example of the maze translated to a list of lists
-
-        #####B#              [[False, False, False, False, False, False, False],
-        ##### #               [False, False, False, False, False, True, False],
-        ####  #               [False, False, False, False, True, True, False],
-        #### ##      -->      [False, False, False, False, True, False, False],
-             ##               [True, True, True, True, True, False, False],
-        A######               [False, False, False, False, False, False, False]]
-        
-        '''
-        self.solution = None
+        # Keep track of walls, one byte per cell (1 is a wall), row i starts at i * width
+        # cells past the end of a short line are open
+        self.walls = bytearray(self.size)
+
+        # Move costs the same way, only kept if the maze has any digits (None means all 1)
+        self.costs = bytearray(b"\x01") * self.size if re.search(rb"[1-9]", contents) else None
+
+        starts = goals = 0
+        row = 0
+        for lines in line_chunks(contents):
+            # Pad short lines with open cells so the chunk is whole rows
+            if min(map(len, lines), default=self.width) < self.width:
+                lines = [line.ljust(self.width) for line in lines]
+            block = b"".join(lines)
+            first = row * self.width
+            self.walls[first:first + len(block)] = block.translate(WALL_BYTES)
+            if self.costs is not None:
+                self.costs[first:first + len(block)] = block.translate(COST_BYTES)
+
+            # (i, j) is (x, y) coordinate
+            if b"A" in block:
+                starts += block.count(b"A")
+                self.start = self.cell_state(first + block.index(b"A"))
+            if b"B" in block:
+                goals += block.count(b"B")
+                self.goal = self.cell_state(first + block.index(b"B"))
+            row += len(lines)
+
+        return starts, goals
+
+    def cell_id(self, state):
+        # (i, j) coordinate to cell id
+        return state[0] * self.width + state[1]
+
+    def cell_state(self, cell):
+        # cell id to (i, j) coordinate
+        return divmod(cell, self.width)
+
+    def is_wall(self, i, j):
+        return self.walls[i * self.width + j] == 1
+
+    def set_wall(self, state, wall):
+        """Makes the (i, j) cell a wall or opens it, dropping anything cached about the walls."""
+        self.walls[self.cell_id(state)] = 1 if wall else 0
+        self.distance_fields.clear()
         
-    def print(self):
-        # if the self.solution is not None, then the solution is the second element of the tuple "only the coords", if the self.solution is None, then the solution is None
+    def print(self, every=1):
+        """Prints the maze with the solution one step at a time, then all at once.
+
+        every prints only every every-th step. Each frame is the plain maze
+        with the row holding that step swapped in, written in a single call.
+        """
+        # if the self.solution is not None, then the solution is the second element of the tuple "only the coords", if the self.solution is None, then the solution is empty
         print(self.solution)
-        solution = self.solution[1] if self.solution is not None else None # self.solution[1] = (i,j)
-        print()
-        for x in range(len(solution)):
-            print("Step", x+1, end=": ")
-            # print("Choices:", len(self.choices[x]), end=" --> ")
-            # print(self.choices[x])
-            # print("Go", self.solution[0][x])
-            print()
-            for i, row in enumerate(self.walls):
-                for j, col in enumerate(row):
-                    if col: # if the col is True, then print a wall
-                        print("█", end="")
-                    elif (i, j) == self.start:
-                        print("A", end="")
-                    elif (i, j) == self.goal and x != len(solution) - 1:
-                        print("B", end="")
-                    elif solution is not None and (i, j) in solution and solution.index((i, j)) == x:
-                        print("*", end="")
-                    else:
-                        print(" ", end="")
-                print()
-            print()
-
-        # iterate through the maze (every row and col) and print the maze
-        print("Solution: \n")
-        for i, row in enumerate(self.walls): # i is the index of the row, row is the list of the row
-            for j, col in enumerate(row): # j is the index of the col, col is the boolean value of the col
-                if col: # if the col is True, then print a wall
-                    print("█", end="")
-                elif (i, j) == self.start:
-                    print("A", end="")
-                elif (i, j) == self.goal:
-                    print("B", end="")
-                elif solution is not None and (i, j) in solution:
-                    print("*", end="")
-                else:
-                    print(" ", end="")
-            print()
+        solution = self.solution[1] if self.solution is not None else [] # self.solution[1] = (i,j)
+        step_of = {cell: x for x, cell in enumerate(solution)} # (i, j) -> step it is reached at
+
+        rows = self.text_rows()
         print()
+        for x in range(0, len(solution), every):
+            # the goal turns into a step when it is reached
+            i, j = solution[x]
+            row = rows[i][:j] + "*" + rows[i][j + 1:]
+            sys.stdout.write("".join([f"Step {x + 1}: \n", *rows[:i], row, *rows[i + 1:], "\n"]))
+
+        # print the maze with every step of the solution
+        solved = list(rows)
+        for i, j in step_of:
+            if (i, j) != self.start and (i, j) != self.goal:
+                solved[i] = solved[i][:j] + "*" + solved[i][j + 1:]
+        sys.stdout.write("".join(["Solution: \n\n", *solved, "\n"]))
         print(self.num_explored, "steps")
 
+    def text_rows(self):
+        """Returns the maze as lines of text, walls as "█" and the start and goal as A and B."""
+        rows = []
+        for i in range(self.height):
+            row = self.walls[i * self.width:(i + 1) * self.width]
+            rows.append(row.decode("latin-1").translate(WALL_CHARS) + "\n")
+        for (i, j), char in ((self.start, "A"), (self.goal, "B")):
+            rows[i] = rows[i][:j] + char + rows[i][j + 1:]
+        return rows
+
     def neighbors(self, state):
-        row, col = state
-
-        # All possible actions
-        candidates = [
-            ("up", (row - 1, col)),
-            ("down", (row + 1, col)),
-            ("left", (row, col - 1)),
-            ("right", (row, col + 1))
+        """Returns (action, (i, j)) pairs for the open cells next to state."""
+        return [
+            (ACTIONS[move], self.cell_state(cell))
+            for move, cell in self.neighbor_ids(self.cell_id(state))
         ]
 
-        # Ensure the actions are valid
+    def neighbor_ids(self, cell):
+        """Returns (move, cell id) pairs for the open cells next to a cell id."""
+        width = self.width
+        col = cell % width
+
+        # Whether each move in ACTIONS stays inside the maze
+        inside = (cell >= width, cell < self.size - width, col > 0, col < width - 1)
+
         result = []
-        for action, (r, c) in candidates: # iterate through the candidates
-            try:
-                if not self.walls[r][c]: # if the candidate is not a wall "True"
-                    result.append((action, (r, c))) # append the action and the coordinates to the result list
-            except IndexError:
-                continue
+        for move, offset in enumerate(self.offsets):
+            if inside[move] and not self.walls[cell + offset]:
+                result.append((move, cell + offset))
         return result
-    
-    def a_star(self, current, goal):
 
-        # Initialize the a_starval list
-        self.a_starval = []
+    def heuristic(self, cell):
+        # Manhattan distance from the cell to the goal
+        row, col = divmod(cell, self.width)
+        return abs(row - self.goal[0]) + abs(col - self.goal[1])
 
-        for x in current:
-            # Manhattan distance
-            self.manhattan =  abs(current[x][0] - goal[0]) + abs(current[x][1] - goal[1])
-            self.a_starval.append(x, (self.manhattan + self.steps))
-        # print(self.manhattan, self.steps)
-        # print(self.a_starval)
-        return (max(self.a_starval[1]), self.a_starval[0])     
+    def frontier_for(self, algorithm):
+        """Returns an empty frontier that expands cells in the order of the algorithm."""
+        if algorithm == "bfs":
+            return queueFrontier()
+        elif algorithm == "dfs":
+            return StackFrontier()
+        elif algorithm == "astar":
+            # steps taken so far plus the estimated steps left,
+            # ties go to the cell closer to the goal
+            def key(cell, cost):
+                h = self.heuristic(cell)
+                return (cost + h, h)
+            return PriorityFrontier(key=key)
+        elif algorithm == "greedy":
+            # only the estimated steps left
+            return PriorityFrontier(key=lambda cell, cost: self.heuristic(cell))
+        elif algorithm == "dijkstra":
+            # cost so far, in buckets as costs are small whole numbers
+            return BucketFrontier(max(self.costs) if self.costs is not None else 1)
+        else:
+            raise ValueError(f"unknown algorithm: {algorithm}")
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, algorithm="bfs"):
+        """Finds a solution to maze, if one exists.
+
+        algorithm is one of "bfs", "dfs", "astar", "greedy", "dijkstra",
+        "bidirectional" or "jps". Only "dijkstra" and "astar" find the
+        cheapest path when cells have move costs, the last two need a maze
+        without them.
+        """
+
+        if algorithm in ("bidirectional", "jps") and self.costs is not None:
+            raise ValueError(f"{algorithm} needs a maze without move costs")
+        if algorithm == "bidirectional":
+            return self.solve_bidirectional()
+        if algorithm == "jps":
+            return self.solve_jps()
 
         # Keep track of number of states explored
         self.num_explored = 0
 
-        # Add steps
-        self.steps = 0
+        # Explored bitmap and the move that reached each explored cell
+        self.explored = bytearray(self.size)
+        self.came_from = bytearray(self.size)
 
         # Initialize frontier to just the starting position
-        start = Node(state=self.start, parent=None, action=None)
-        frontier = queueFrontier()
-        frontier.add(start) # add the start node to the frontier
-        frontier.a_star(self.goal, self.steps)
-
-        # Initialize an empty explored set
-        self.explored = set()
-
-        # Add choices to the frontier
-        # self.choices = []
+        frontier = self.frontier_for(algorithm)
+        frontier.add(self.cell_id(self.start), START, 0)
+        goal = self.cell_id(self.goal)
+        costs = self.costs
 
         # Keep looping until solution found
         while True:
 
-            # count the number of steps
-            self.steps += 1
-
             # If nothing left in frontier, then no path
             if frontier.empty():
                 raise Exception("no solution")
 
-            # Choose a node from the frontier
-            # self.a_starval, self.starstate = self.a_star(frontier.frontier, self.goal)
-            node = frontier.remove()
+            # Choose a cell from the frontier, a cell can be queued more than once
+            # so copies of an already explored cell are skipped (lazy deletion)
+            cell, move, cost = frontier.remove()
+            if self.explored[cell]:
+                continue
+            self.came_from[cell] = move
             self.num_explored += 1
 
-            # If node is the goal, then we have a solution
-            if node.state == self.goal:
-                actions = []
-                cells = []
-
-                # Follow parent nodes to find the solution
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
-                # self.turns = len(self.solution)
+            # If cell is the goal, then we have a solution
+            if cell == goal:
+                self.solution = self.trace(cell)
                 return
 
-            # Mark node as explored
-            self.explored.add(node.state)
-
-            # self.temp = []
+            # Mark cell as explored
+            self.explored[cell] = 1
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
-
-                if not frontier.contains_state(state) and state not in self.explored:
-
-                    # create a new node named child with the state as correct state after neigbour checking, parent as the current node, and action from the neighbour checking
-                    child = Node(state=state, parent=node, action=action)
-                    frontier.add(child)
-
-                    # Add choices to the temp
-                    # self.temp.append((self.a_starval ,child.state, child.action))
-
-            # Add temp to the choices
-            # self.choices.append(self.temp)
-
-            # print(self.choices)
-
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        cell_size = 50
-        cell_border = 2
-
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
-
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
-
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
-                    draw.rectangle(
-                        ([(j * cell_size, i * cell_size), ((j + 1) * cell_size, (i + 1) * cell_size)]),
-                        fill=fill
-                    )
-
-                # Start
-                if (i, j) == self.start:
-                    fill = (255, 0, 0)
-                    draw.rectangle(
-                        ([(j * cell_size + cell_border, i * cell_size + cell_border), ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                        fill=fill
-                    )
-
-                # Goal
-                if (i, j) == self.goal:
-                    fill = (0, 171, 28)
-                    draw.rectangle(
-                        ([(j * cell_size + cell_border, i * cell_size + cell_border), ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                        fill=fill
-                    )
-
-                # Solution
-                if solution is not None and (i, j) in solution:
-                    fill = (220, 235, 113)
-                    draw.rectangle(
-                        ([(j * cell_size + cell_border, i * cell_size + cell_border), ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                        fill=fill
-                    )
-
-                # Explored
-                if show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
-                    draw.rectangle(
-                        ([(j * cell_size + cell_border, i * cell_size + cell_border), ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                        fill=fill
-                    )
+            for move, neighbor in self.neighbor_ids(cell):
+                if not self.explored[neighbor]:
+                    frontier.add(neighbor, move, cost + (costs[neighbor] if costs is not None else 1))
+
+    def solve_bidirectional(self):
+        """Breadth-first search from the start and the goal at once, until the two meet."""
+
+        self.num_explored = 0
+        self.explored = bytearray(self.size)
+        self.came_from = bytearray(self.size)
+        back = bytearray(self.size) # move that reached each cell on the goal side
+
+        # Which side reached each cell: 1 from the start, 2 from the goal
+        start, goal = self.cell_id(self.start), self.cell_id(self.goal)
+        reached = bytearray(self.size)
+        reached[start], reached[goal] = 1, 2
+        self.came_from[start] = START
+        frontiers = {1: [start], 2: [goal]}
+        moves = {1: self.came_from, 2: back}
+
+        while frontiers[1] and frontiers[2]:
+
+            # Grow the side with the smaller frontier by one whole layer
+            side = 1 if len(frontiers[1]) <= len(frontiers[2]) else 2
+            other = 3 - side
+            layer = []
+            for cell in frontiers[side]:
+                self.explored[cell] = 1
+                self.num_explored += 1
+                for move, neighbor in self.neighbor_ids(cell):
+
+                    # The first meeting is a shortest path: before it the two reached
+                    # sets are disjoint, so the other side can only have reached
+                    # neighbor in its newest layer
+                    if reached[neighbor] == other:
+                        if side == 1:
+                            self.join(cell, neighbor, move, back)
+                        else:
+                            self.join(neighbor, cell, move ^ 1, back)
+                        self.solution = self.trace(goal)
+                        return
+
+                    if not reached[neighbor]:
+                        reached[neighbor] = side
+                        moves[side][neighbor] = move
+                        layer.append(neighbor)
+            frontiers[side] = layer
+
+        raise Exception("no solution")
+
+    def join(self, cell, neighbor, move, back):
+        """Links the start side cell to the goal side neighbor it reaches by move,
+        then turns the goal side moves in back into self.came_from up to the goal."""
+        goal = self.cell_id(self.goal)
+        self.came_from[neighbor] = move
+        cell = neighbor
+        while cell != goal:
+            move = back[cell]
+            cell -= self.offsets[move]
+            self.came_from[cell] = move ^ 1 # ACTIONS come in opposite pairs
+
+    def solve_jps(self):
+        """A* that only queues jump points (Jump Point Search, 4-connected).
+
+        Straight runs of cells with nothing forcing a turn are skipped over,
+        so of the many equally short paths only one is ever looked at.
+        """
+
+        self.num_explored = 0
+        self.explored = bytearray(self.size)
+        self.came_from = bytearray(self.size)
+        start, goal = self.cell_id(self.start), self.cell_id(self.goal)
+        parents = {} # explored jump point -> jump point it was reached from
+
+        # Same ordering as A*, the move slot holds the parent jump point
+        frontier = self.frontier_for("astar")
+        frontier.add(start, None, 0)
+
+        while True:
+
+            if frontier.empty():
+                raise Exception("no solution")
+
+            cell, parent, cost = frontier.remove()
+            if self.explored[cell]:
+                continue
+            parents[cell] = parent
+            self.num_explored += 1
+
+            if cell == goal:
+                self.came_from[start] = START
+                self.unfold(parents, goal)
+                self.solution = self.trace(goal)
+                return
+
+            self.explored[cell] = 1
+
+            for move in self.jump_moves(cell, parent):
+                point = self.jump(cell, move, goal)
+                if point is not None and not self.explored[point]:
+                    frontier.add(point, cell, cost + self.distance(cell, point))
+
+    def jump_moves(self, cell, parent):
+        """Moves worth jumping in from cell, given the jump point it was reached from."""
+        if parent is None:
+            return range(len(ACTIONS))
+        move = self.direction(parent, cell)
+        if move >= 2:
+            # moving left or right: keep going, or turn up or down
+            return (move, 0, 1)
+        # moving up or down: keep going, or turn left or right
+        return (move, 2, 3)
+
+    def jump(self, cell, move, goal):
+        """Steps from cell in a straight line, returns the next jump point or None."""
+        sides = (0, 1) if move >= 2 else (2, 3) # moves at a right angle to move
+        while True:
+            behind = cell
+            cell = self.step(cell, move)
+            if cell is None:
+                return None
+            if cell == goal:
+                return cell
+
+            # Forced neighbor: a side cell is open but the one beside the
+            # previous cell is not, so the shortest way there turns here
+            for side in sides:
+                if self.step(cell, side) is not None and self.step(behind, side) is None:
+                    return cell
+
+            # Vertical runs stop where a horizontal run finds a jump point
+            if move < 2:
+                for side in sides:
+                    if self.jump(cell, side, goal) is not None:
+                        return cell
+
+    def step(self, cell, move):
+        """Cell id one move away from cell, or None if that is a wall or outside the maze."""
+        col = cell % self.width
+        if (move == 0 and cell < self.width
+                or move == 1 and cell >= self.size - self.width
+                or move == 2 and col == 0
+                or move == 3 and col == self.width - 1):
+            return None
+        neighbor = cell + self.offsets[move]
+        return None if self.walls[neighbor] else neighbor
+
+    def direction(self, cell, other):
+        """The move that heads from cell towards other on the same row or column."""
+        row, col = divmod(cell, self.width)
+        other_row, other_col = divmod(other, self.width)
+        if other_row != row:
+            return 0 if other_row < row else 1
+        return 2 if other_col < col else 3
+
+    def distance(self, cell, other):
+        # Manhattan distance between two cell ids
+        row, col = divmod(cell, self.width)
+        other_row, other_col = divmod(other, self.width)
+        return abs(row - other_row) + abs(col - other_col)
+
+    def unfold(self, parents, cell):
+        """Fills self.came_from along the straight runs between jump points back from cell."""
+        while parents[cell] is not None:
+            parent = parents[cell]
+            move = self.direction(parent, cell)
+            while cell != parent:
+                self.came_from[cell] = move
+                cell -= self.offsets[move]
+
+    def trace(self, cell):
+        """Follows self.came_from back from cell to the start, returns (actions, cells)."""
+        actions = []
+        cells = []
+        while self.came_from[cell] != START:
+            move = self.came_from[cell]
+            actions.append(ACTIONS[move])
+            cells.append(self.cell_state(cell))
+            cell -= self.offsets[move]
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+    def solution_cost(self):
+        # total cost of the moves in self.solution
+        cells = self.solution[1]
+        if self.costs is None:
+            return len(cells)
+        return sum(self.costs[self.cell_id(state)] for state in cells)
+
+    def distance_field(self, goal=None):
+        """Returns the number of steps from every cell to the nearest goal.
+
+        goal is an (i, j) cell or a list of them, self.goal by default. The
+        distances come from one breadth-first search out of all the goals at
+        once and are kept until the walls change, for the DISTANCE_FIELDS goal
+        sets used last; -1 marks cells that cannot reach a goal. The result
+        is an array("i") indexed by cell id.
+        Steps are not costs, so the maze must not have move costs.
+        """
+        if self.costs is not None:
+            raise ValueError("distance_field needs a maze without move costs")
+        goals = self.goal_ids(goal)
+        if goals in self.distance_fields:
+            self.distance_fields.move_to_end(goals)
+            return self.distance_fields[goals]
+
+        distances = array("i", [-1]) * self.size
+        frontier = deque(goals)
+        for cell in goals:
+            distances[cell] = 0
+        while frontier:
+            cell = frontier.popleft()
+            for _, neighbor in self.neighbor_ids(cell):
+                if distances[neighbor] == -1:
+                    distances[neighbor] = distances[cell] + 1
+                    frontier.append(neighbor)
+
+        self.distance_fields[goals] = distances
+        if len(self.distance_fields) > DISTANCE_FIELDS:
+            self.distance_fields.popitem(last=False)
+        return distances
+
+    def path_from(self, start, goal=None):
+        """Returns (actions, cells) of a shortest path from the (i, j) start to the goal.
+
+        Uses the cached distance_field(goal), stepping to a neighbor one step
+        closer each time, so only the path itself is walked.
+        """
+        distances = self.distance_field(goal)
+        cell = self.cell_id(start)
+        if distances[cell] == -1:
+            raise Exception("no solution")
+
+        actions = []
+        cells = []
+        while distances[cell]:
+            for move, neighbor in self.neighbor_ids(cell):
+                if distances[neighbor] == distances[cell] - 1:
+                    break
+            actions.append(ACTIONS[move])
+            cells.append(self.cell_state(neighbor))
+            cell = neighbor
+        return (actions, cells)
+
+    def goal_ids(self, goal):
+        # goal argument of distance_field to a sorted tuple of cell ids
+        if goal is None:
+            goal = self.goal
+        if isinstance(goal[0], int):
+            goal = [goal]
+        return tuple(sorted(set(self.cell_id(state) for state in goal)))
+
+    def output_image(self, filename, show_solution=True, show_explored=False, cell_size=50, cell_border=2):
+        """Saves the maze as an image, each cell a cell_size square of pixels.
+
+        The picture is built one color per cell with NumPy masks and then
+        blown up to pixels by block repetition, never drawing cell by cell.
+        """
+        import numpy as np
+
+        # Background of every cell: walls fill the whole square, the rest is black
+        walls = np.frombuffer(self.walls, dtype=np.uint8).reshape(self.height, self.width).astype(bool)
+        background = np.zeros((self.height, self.width, 3), dtype=np.uint8)
+        background[walls] = (40, 40, 40)
+
+        # Inside of every cell, later layers paint over earlier ones
+        inside = background.copy()
+        inside[self.start] = (255, 0, 0) # Start
+        inside[self.goal] = (0, 171, 28) # Goal
+        if show_solution and self.solution is not None and self.solution[1]:
+            rows, cols = zip(*self.solution[1])
+            inside[list(rows), list(cols)] = (220, 235, 113) # Solution
+        if show_explored:
+            explored = np.frombuffer(self.explored, dtype=np.uint8).reshape(self.height, self.width).astype(bool)
+            inside[explored] = (212, 97, 85) # Explored
+
+        # Repeat each cell over its square, with cell_border pixels of background around the inside
+        pixels = np.empty((self.height, cell_size, self.width, cell_size, 3), dtype=np.uint8)
+        pixels[:] = background[:, None, :, None, :]
+        inner = slice(cell_border, cell_size - cell_border)
+        pixels[:, inner, :, inner, :] = inside[:, None, :, None, :]
+
+        img = Image.fromarray(pixels.reshape(self.height * cell_size, self.width * cell_size, 3), "RGB")
         img.save(filename)
 
-game = maze(r"c:\Users\ICiva\coding project\AI\Intro\maze1.txt")
-game.solve()
-game.print()
-game.output_image("maze1.png", show_explored=True, show_solution=True)
 
+class DStarLite():
+
+    '''Incremental planner for a maze whose walls change between queries (D* Lite).
+
+       The search runs backwards from the goal and keeps its g and rhs values
+       between plans, so after set_wall only the cells whose distance to the
+       goal actually changed are searched again. Every step costs one, so
+       the maze must not have move costs.'''
+
+    def __init__(self, maze):
+        if maze.costs is not None:
+            raise ValueError("DStarLite needs a maze without move costs")
+        self.maze = maze
+        self.start = maze.cell_id(maze.start)
+        self.goal = maze.cell_id(maze.goal)
+        self.km = 0 # grows by how far the start moved, keeps old keys valid
+        self.g = {} # cell -> distance to the goal as last expanded, missing means infinite
+        self.rhs = {} # cell -> one step lookahead of g, missing means infinite
+        self.frontier = [] # heap of (key, cell), stale entries are skipped
+        self.queued = {} # cell -> key it is queued with
+        self.num_explored = 0
+
+        self.rhs[self.goal] = 0
+        self.push(self.goal)
+
+    def key(self, cell):
+        best = min(self.g.get(cell, INFINITY), self.rhs.get(cell, INFINITY))
+        return (best + self.maze.distance(self.start, cell) + self.km, best)
+
+    def push(self, cell):
+        key = self.key(cell)
+        self.queued[cell] = key
+        heapq.heappush(self.frontier, (key, cell))
+
+    def top(self):
+        # Drop entries that were requeued or removed since they were pushed
+        while self.frontier and self.queued.get(self.frontier[0][1]) != self.frontier[0][0]:
+            heapq.heappop(self.frontier)
+        return self.frontier[0] if self.frontier else ((INFINITY, INFINITY), None)
+
+    def update(self, cell):
+        """Recomputes the rhs of cell from its neighbors and queues it if it is inconsistent."""
+        if cell != self.goal:
+            if self.maze.walls[cell]:
+                self.rhs[cell] = INFINITY
+            else:
+                self.rhs[cell] = min(
+                    (1 + self.g.get(neighbor, INFINITY) for _, neighbor in self.maze.neighbor_ids(cell)),
+                    default=INFINITY
+                )
+        self.queued.pop(cell, None)
+        if self.g.get(cell, INFINITY) != self.rhs.get(cell, INFINITY):
+            self.push(cell)
+
+    def compute(self):
+        # Expand cells until the start is consistent and nothing queued can improve it
+        while True:
+            key, cell = self.top()
+            if key >= self.key(self.start) and self.rhs.get(self.start, INFINITY) == self.g.get(self.start, INFINITY):
+                return
+            heapq.heappop(self.frontier)
+            del self.queued[cell]
+            self.num_explored += 1
+
+            new_key = self.key(cell)
+            if key < new_key:
+                self.push(cell)
+            elif self.g.get(cell, INFINITY) > self.rhs[cell]:
+                self.g[cell] = self.rhs[cell]
+                for _, neighbor in self.maze.neighbor_ids(cell):
+                    self.update(neighbor)
+            else:
+                self.g[cell] = INFINITY
+                self.update(cell)
+                for _, neighbor in self.maze.neighbor_ids(cell):
+                    self.update(neighbor)
+
+    def plan(self):
+        """Repairs the search after any changes and returns (actions, cells) from start to goal.
+
+        Also sets maze.solution; num_explored counts the cells expanded by this call.
+        """
+        self.num_explored = 0
+        self.compute()
+        if self.g.get(self.start, INFINITY) == INFINITY:
+            raise Exception("no solution")
+
+        # Follow the neighbor closest to the goal each step
+        actions = []
+        cells = []
+        cell = self.start
+        while cell != self.goal:
+            move, cell = min(
+                self.maze.neighbor_ids(cell),
+                key=lambda pair: self.g.get(pair[1], INFINITY)
+            )
+            actions.append(ACTIONS[move])
+            cells.append(self.maze.cell_state(cell))
+        self.maze.solution = (actions, cells)
+        self.maze.num_explored = self.num_explored
+        return self.maze.solution
+
+    def set_wall(self, state, wall):
+        """Makes the (i, j) cell a wall or opens it, the next plan repairs the path."""
+        cell = self.maze.cell_id(state)
+        if self.maze.walls[cell] == (1 if wall else 0):
+            return
+
+        # Every edge in and out of the cell changed cost
+        self.maze.set_wall(state, wall)
+        self.update(cell)
+        for _, neighbor in self.maze.neighbor_ids(cell):
+            self.update(neighbor)
+
+    def set_start(self, state):
+        """Moves the start to the (i, j) cell, e.g. after walking part of the path."""
+        cell = self.maze.cell_id(state)
+        self.km += self.maze.distance(self.start, cell)
+        self.start = cell
+        self.maze.start = state
+
+
+class HierarchicalIndex():
+
+    '''Hierarchical pathfinding index (HPA*) for very large mazes.
+
+       The maze is cut into cluster_size x cluster_size clusters. Where two
+       clusters touch along a run of open cells, the middle of the run is an
+       entrance with a node on each side. Nodes in the same cluster are linked
+       by their distance inside it, so a query only searches this small graph
+       and then fills in the cells of the edges it actually used. Paths are
+       close to, but not always exactly, the shortest. Distances are counted
+       in steps, so the maze must not have move costs.'''
+
+    def __init__(self, maze, cluster_size=CLUSTER_SIZE, build=True):
+        if maze.costs is not None:
+            raise ValueError("HierarchicalIndex needs a maze without move costs")
+        self.maze = maze
+        self.cluster_size = cluster_size
+        if build:
+            self.build()
+
+    def build(self):
+        """Finds the entrances and the distances between them inside every cluster."""
+        maze, size = self.maze, self.cluster_size
+        edges = {} # node -> {node: cost}
+
+        def link(cell, other, cost):
+            edges.setdefault(cell, {})[other] = cost
+            edges.setdefault(other, {})[cell] = cost
+
+        # Entrances across the borders between clusters, one per run of open pairs
+        for border in range(size, maze.width, size):
+            for row in range(0, maze.height, size):
+                pairs = [
+                    (maze.cell_id((i, border - 1)), maze.cell_id((i, border)))
+                    for i in range(row, min(row + size, maze.height))
+                ]
+                for cell, other in self.entrances(pairs):
+                    link(cell, other, 1)
+        for border in range(size, maze.height, size):
+            for col in range(0, maze.width, size):
+                pairs = [
+                    (maze.cell_id((border - 1, j)), maze.cell_id((border, j)))
+                    for j in range(col, min(col + size, maze.width))
+                ]
+                for cell, other in self.entrances(pairs):
+                    link(cell, other, 1)
+
+        # Distances between the nodes of each cluster, searched inside the cluster only
+        clusters = {}
+        for cell in edges:
+            clusters.setdefault(self.cluster(cell), []).append(cell)
+        for cluster, cells in clusters.items():
+            grid = self.local_grid(cluster)
+            for n, cell in enumerate(cells):
+                distances, _ = self.local_search(cell, cluster, cells[n + 1:], grid)
+                for other in cells[n + 1:]:
+                    if self.local(other, grid) in distances:
+                        link(cell, other, distances[self.local(other, grid)])
+
+        # Store the graph as sorted node ids with compressed edge lists (CSR)
+        self.nodes = array("q", sorted(edges))
+        self.offsets = array("q", [0])
+        self.targets = array("q")
+        self.costs = array("i")
+        for cell in self.nodes:
+            for other, cost in edges[cell].items():
+                self.targets.append(other)
+                self.costs.append(cost)
+            self.offsets.append(len(self.targets))
+        self.index = {cell: n for n, cell in enumerate(self.nodes)}
+        self.walls_crc = zlib.crc32(maze.walls)
+
+    def check(self):
+        # The index only describes the walls it was built for
+        if zlib.crc32(self.maze.walls) != self.walls_crc:
+            raise Exception("the maze's walls changed since the index was built")
+
+    def entrances(self, pairs):
+        """Returns one (cell, other) pair from the middle of every run of open pairs."""
+        result = []
+        run = []
+        for cell, other in pairs + [(None, None)]:
+            if cell is not None and not self.maze.walls[cell] and not self.maze.walls[other]:
+                run.append((cell, other))
+            elif run:
+                result.append(run[len(run) // 2])
+                run = []
+        return result
+
+    def cluster(self, cell):
+        # (row, col) of the cluster holding a cell id
+        row, col = self.maze.cell_state(cell)
+        return (row // self.cluster_size, col // self.cluster_size)
+
+    def local_search(self, source, cluster, targets, grid=None):
+        """Breadth-first search from source that stays inside cluster.
+
+        Stops once every cell in targets is reached and returns
+        (distances, parents) for the targets and the cells on the way, keyed
+        by local index in the cluster's grid (see local_grid).
+        """
+        grid = grid or self.local_grid(cluster)
+        walls, width = grid[0], grid[3]
+        source = self.local(source, grid)
+        wanted = {self.local(cell, grid) for cell in targets}
+        wanted.discard(source)
+
+        # The ring of walls around the grid means no bounds checks are needed
+        offsets = (-width, width, -1, 1)
+        distances = {source: 0}
+        parents = {source: None}
+        frontier = deque([source])
+        while frontier and wanted:
+            cell = frontier.popleft()
+            for offset in offsets:
+                neighbor = cell + offset
+                if not walls[neighbor] and neighbor not in distances:
+                    distances[neighbor] = distances[cell] + 1
+                    parents[neighbor] = cell
+                    wanted.discard(neighbor)
+                    frontier.append(neighbor)
+        return distances, parents
+
+    def local_grid(self, cluster):
+        """Returns (walls, top, left, width) for a cluster: its walls with a ring
+        of walls around them, the maze row and col of its corner and its width
+        including the ring."""
+        top = cluster[0] * self.cluster_size
+        left = cluster[1] * self.cluster_size
+        right = min(left + self.cluster_size, self.maze.width)
+        width = right - left + 2
+        walls = bytearray(b"\x01") * width
+        for row in range(top, min(top + self.cluster_size, self.maze.height)):
+            start = row * self.maze.width
+            walls += b"\x01" + self.maze.walls[start + left:start + right] + b"\x01"
+        walls += b"\x01" * width
+        return (walls, top, left, width)
+
+    def local(self, cell, grid):
+        # maze cell id to its index in a cluster grid
+        row, col = divmod(cell, self.maze.width)
+        return (row - grid[1] + 1) * grid[3] + col - grid[2] + 1
+
+    def unlocal(self, index, grid):
+        # index in a cluster grid back to the maze cell id
+        row, col = divmod(index, grid[3])
+        return (row - 1 + grid[1]) * self.maze.width + col - 1 + grid[2]
+
+    def path(self, start=None, goal=None):
+        """Returns (actions, cells) from start to goal ((i, j) cells, the maze's own by default).
+
+        Also sets maze.solution; maze.num_explored counts the abstract nodes expanded.
+        Raises an Exception if the walls changed since the index was built.
+        """
+        self.check()
+        maze = self.maze
+        start = maze.cell_id(maze.start if start is None else start)
+        goal = maze.cell_id(maze.goal if goal is None else goal)
+
+        # Link start and goal to the nodes of their clusters for this query only
+        extra = {start: {}, goal: {}}
+        for cell in (start, goal):
+            cluster = self.cluster(cell)
+            nodes = self.cluster_nodes(cluster)
+            if cell == start and self.cluster(goal) == cluster:
+                nodes.append(goal)
+            grid = self.local_grid(cluster)
+            distances, _ = self.local_search(cell, cluster, nodes, grid)
+            for node in nodes:
+                distance = distances.get(self.local(node, grid))
+                if distance is not None and node != cell:
+                    extra[cell][node] = distance
+                    extra.setdefault(node, {})[cell] = distance
+
+        # A* over the abstract graph
+        maze.num_explored = 0
+        best = {start: 0}
+        parents = {start: None}
+        frontier = [(maze.distance(start, goal), maze.distance(start, goal), 0, start)]
+        while frontier:
+            _, _, cost, cell = heapq.heappop(frontier)
+            if cost > best[cell]:
+                continue
+            maze.num_explored += 1
+            if cell == goal:
+                break
+            for other, step in self.abstract_neighbors(cell, extra):
+                if cost + step < best.get(other, INFINITY):
+                    best[other] = cost + step
+                    parents[other] = cell
+                    # ties go to the node closer to the goal
+                    h = maze.distance(other, goal)
+                    heapq.heappush(frontier, (cost + step + h, h, cost + step, other))
+        else:
+            raise Exception("no solution")
+
+        # Refine each abstract edge of the path into cells
+        nodes = []
+        while cell is not None:
+            nodes.append(cell)
+            cell = parents[cell]
+        nodes.reverse()
+        cells = [start]
+        for cell, other in zip(nodes, nodes[1:]):
+            cells.extend(self.refine(cell, other))
+
+        actions = [ACTIONS[maze.direction(cell, other)] for cell, other in zip(cells, cells[1:])]
+        maze.solution = (actions, [maze.cell_state(cell) for cell in cells[1:]])
+        return maze.solution
+
+    def cluster_nodes(self, cluster):
+        # Abstract nodes inside a cluster, found from the cluster's corner cells
+        top = cluster[0] * self.cluster_size
+        left = cluster[1] * self.cluster_size
+        bottom = min(top + self.cluster_size, self.maze.height)
+        right = min(left + self.cluster_size, self.maze.width)
+        first = bisect.bisect_left(self.nodes, self.maze.cell_id((top, left)))
+        last = bisect.bisect_right(self.nodes, self.maze.cell_id((bottom - 1, right - 1)))
+        return [
+            cell for cell in self.nodes[first:last]
+            if left <= cell % self.maze.width < right
+        ]
+
+    def abstract_neighbors(self, cell, extra):
+        # Stored edges of a node plus the edges added for this query
+        result = list(extra.get(cell, {}).items())
+        n = self.index.get(cell)
+        if n is not None:
+            for k in range(self.offsets[n], self.offsets[n + 1]):
+                result.append((self.targets[k], self.costs[k]))
+        return result
+
+    def refine(self, cell, other):
+        """Returns the cells after cell up to other along a shortest way between them."""
+        if self.cluster(cell) != self.cluster(other):
+            return [other] # a step across a cluster border
+        grid = self.local_grid(self.cluster(cell))
+        _, parents = self.local_search(cell, self.cluster(cell), [other], grid)
+        cells = []
+        index = self.local(other, grid)
+        if index not in parents:
+            raise Exception("no solution")
+        while parents[index] is not None:
+            cells.append(self.unlocal(index, grid))
+            index = parents[index]
+        cells.reverse()
+        return cells
+
+    def save(self, filename):
+        """Writes the index to a file, together with what it needs to check the maze matches.
+
+        The file is HPA_MAGIC, the length of a JSON header, the header and then
+        the raw arrays, each 8-byte aligned; the header says where each array
+        is and of what type, so loading never runs code from the file.
+        """
+        header = {
+            "height": self.maze.height,
+            "width": self.maze.width,
+            "walls": self.walls_crc,
+            "cluster_size": self.cluster_size,
+            "byteorder": sys.byteorder,
+            "arrays": {},
+        }
+        blobs = []
+        offset = 0
+        for name in HPA_ARRAYS:
+            values = getattr(self, name)
+            blob = values.tobytes()
+            header["arrays"][name] = [offset, len(values), values.typecode]
+            blobs.append(blob + b"\0" * (-len(blob) % 8))
+            offset += len(blobs[-1])
+
+        encoded = json.dumps(header).encode("utf-8")
+        encoded += b" " * (-len(encoded) % 8)
+        with open(filename, "wb") as f:
+            f.write(HPA_MAGIC)
+            f.write(len(encoded).to_bytes(8, "little"))
+            f.write(encoded)
+            f.writelines(blobs)
+
+    @classmethod
+    def load(cls, filename, maze):
+        """Reads an index saved for maze, raises an Exception if it was built
+        for other walls or the file is not an index."""
+        with open(filename, "rb") as f:
+            data = f.read()
+        start = len(HPA_MAGIC) + 8
+        if data[:len(HPA_MAGIC)] != HPA_MAGIC:
+            raise Exception("not a maze index file")
+        length = int.from_bytes(data[len(HPA_MAGIC):start], "little")
+        header = json.loads(data[start:start + length])
+        if (header["height"], header["width"], header["walls"]) != (maze.height, maze.width, zlib.crc32(maze.walls)):
+            raise Exception("index was built for a different maze")
+
+        index = cls(maze, header["cluster_size"], build=False)
+        body = memoryview(data)[start + length:]
+        for name in HPA_ARRAYS:
+            offset, count, typecode = header["arrays"][name]
+            values = array(HPA_ARRAYS[name])
+            if typecode != values.typecode:
+                raise Exception("not a maze index file")
+            values.frombytes(body[offset:offset + count * values.itemsize])
+            if len(values) != count:
+                raise Exception("index file is truncated")
+            if header["byteorder"] != sys.byteorder:
+                values.byteswap()
+            setattr(index, name, values)
+        index.index = {cell: n for n, cell in enumerate(index.nodes)}
+        index.walls_crc = header["walls"]
+        return index
+
+
+def solve_file(filename, algorithm="bfs"):
+    """Solves one maze file and returns a dict describing the result."""
+    result = {"file": filename, "algorithm": algorithm}
+    started = time.perf_counter()
+    try:
+        game = maze(filename)
+        game.solve(algorithm)
+        result["status"] = "solved"
+        result["path_length"] = len(game.solution[1])
+        result["explored"] = game.num_explored
+        result["path_cost"] = game.solution_cost()
+    except Exception as e:
+        if str(e) == "no solution":
+            result["status"] = "no solution"
+        else:
+            result["status"] = "error"
+            result["error"] = str(e)
+    result["seconds"] = round(time.perf_counter() - started, 6)
+    return result
+
+
+def solve_files(filenames, algorithm="bfs", workers=1, timeout=None):
+    """Solves maze files in worker processes and yields their solve_file
+    results in the order they finish.
+
+    A maze still being solved after timeout seconds is reported with status
+    "timeout": its worker process is terminated from here and a fresh one
+    takes its place, which works the same on every platform.
+    """
+    if workers < 1:
+        raise ValueError("solve_files needs at least one worker")
+    filenames = deque(filenames)
+    idle = [] # (connection, process) of workers waiting for a maze
+    busy = {} # connection -> (process, filename, started) of workers solving one
+    try:
+        while filenames or busy:
+            while filenames and len(busy) < workers:
+                connection, process = idle.pop() if idle else start_worker()
+                filename = filenames.popleft()
+                connection.send((filename, algorithm))
+                busy[connection] = (process, filename, time.perf_counter())
+
+            # Wait for a result, but no longer than the oldest maze has left
+            wait = None
+            if timeout is not None:
+                oldest = min(started for _, _, started in busy.values())
+                wait = max(0, oldest + timeout - time.perf_counter())
+
+            for connection in multiprocessing.connection.wait(list(busy), wait):
+                process, filename, started = busy.pop(connection)
+                try:
+                    result = connection.recv()
+                except EOFError:
+                    # The worker died without answering
+                    process.join()
+                    connection.close()
+                    result = {"file": filename, "algorithm": algorithm, "status": "error",
+                              "error": f"worker exited with code {process.exitcode}"}
+                else:
+                    idle.append((connection, process))
+                yield result
+
+            if timeout is not None:
+                now = time.perf_counter()
+                for connection, (process, filename, started) in list(busy.items()):
+                    if now - started >= timeout:
+                        del busy[connection]
+                        process.terminate()
+                        process.join()
+                        connection.close()
+                        yield {"file": filename, "algorithm": algorithm, "status": "timeout",
+                               "seconds": round(now - started, 6)}
+    finally:
+        for connection, process in idle:
+            connection.send(None)
+        for process, _, _ in busy.values():
+            process.terminate()
+        for _, process in idle:
+            process.join()
+        for process, _, _ in busy.values():
+            process.join()
+
+
+def start_worker():
+    """Starts a worker process for solve_files, returns (connection, process)."""
+    connection, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=solve_worker, args=(child,), daemon=True)
+    process.start()
+    child.close()
+    return connection, process
+
+
+def solve_worker(connection):
+    # Runs in a worker process: solves the (filename, algorithm) tasks it is sent until it gets None
+    while True:
+        task = connection.recv()
+        if task is None:
+            return
+        connection.send(solve_file(*task))
+
+
+def positive_int(text):
+    # argparse type for counts that must be at least 1
+    value = int(text)
+    if value < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1: {text}")
+    return value
+
+
+def maze_files(paths):
+    """Expands directories in paths to the .txt maze files inside them."""
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(sorted(
+                os.path.join(path, name) for name in os.listdir(path) if name.endswith(".txt")
+            ))
+        else:
+            files.append(path)
+    return files
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Solve maze files in parallel and print one JSON line per maze."
+    )
+    parser.add_argument("paths", nargs="*", help="maze files or directories of .txt maze files")
+    parser.add_argument("-a", "--algorithm", default="bfs", choices=ALGORITHMS)
+    parser.add_argument("-j", "--workers", type=positive_int, default=os.cpu_count() or 1, help="number of worker processes")
+    parser.add_argument("-t", "--timeout", type=float, help="seconds allowed per maze")
+    args = parser.parse_args()
+
+    # Without paths, solve the example maze next to this file and show it
+    if not args.paths:
+        game = maze(os.path.join(os.path.dirname(os.path.abspath(__file__)), "maze1.txt"))
+        game.solve(args.algorithm)
+        game.print()
+        game.output_image("maze1.png", show_explored=True, show_solution=True)
+        return
+
+    for result in solve_files(maze_files(args.paths), args.algorithm, args.workers, args.timeout):
+        print(json.dumps(result), flush=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,55 +1,316 @@
 import csv
+import heapq
+import multiprocessing
+import os
 import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 
-from util import Node, StackFrontier, QueueFrontier
+import snapshot
+from graph import Graph
+from landmarks import Landmarks
+from nameindex import NameIndex
+from pathdag import PathDAG
+from tables import NameTable, Table
+from util import trace
 
-# Maps names to a set of corresponding person_ids
-names = {}
+# Columns load_data reads from each CSV file
+COLUMNS = {
+    "people": ("id", "name", "birth"),
+    "movies": ("id", "title", "year"),
+    "stars": ("person_id", "movie_id"),
+}
 
-# Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids)
-people = {}
+# File in the data directory that load_data keeps its binary snapshot in
+SNAPSHOT = "degrees.snapshot"
 
-# Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
-movies = {}
+# Changes whenever the snapshots get other sections or integer ids are numbered
+# another way, so older snapshots (of the data and of landmarks) are rebuilt
+SNAPSHOT_VERSION = 2
 
+# File in the data directory that load_landmarks keeps landmark distances in
+LANDMARKS_SNAPSHOT = "landmarks.snapshot"
 
-def load_data(directory):
+# Number of landmarks load_landmarks picks by default
+LANDMARKS = 16
+
+# Bytes of BFS trees that bfs_tree keeps before dropping the least recently used
+TREE_CACHE_BYTES = 256 * 1024 * 1024
+
+# Number of year filters whose movie masks year_mask keeps
+YEAR_MASKS = 32
+
+# Columns on dense integer ids: person n has the person_id person_ids[n],
+# the name person_names[n] and the birth person_births[n], likewise for movies
+person_ids = []
+person_names = []
+person_births = []
+movie_ids = []
+movie_titles = []
+movie_years = []
+
+# Maps person_ids and movie_ids to their integer ids
+person_index = {}
+movie_index = {}
+
+# Maps names to a set of corresponding person_ids (see tables.NameTable)
+names = NameTable([], array("q"), array("i"), person_ids)
+
+# Maps person_ids to a dictionary of: name, birth (see tables.Table)
+people = Table(person_index, ("name", "birth"), (person_names, person_births))
+
+# Maps movie_ids to a dictionary of: title, year
+movies = Table(movie_index, ("title", "year"), (movie_titles, movie_years))
+
+# Integer movie ids sorted by year, and their years in the same order
+# (movies without a year are left out)
+movies_by_year = array("i")
+years = array("i")
+
+# Maps (first, last) year filters to their movie masks, least recently used first
+year_masks = OrderedDict()
+
+# Who starred in what, on integer ids (see graph.Graph)
+graph = None
+
+# Distances from landmark people, once load_landmarks ran (see landmarks.Landmarks)
+landmarks = None
+
+# Maps integer person ids to their BFS trees, least recently used first
+trees = OrderedDict()
+
+# Index of the keys of names for completion, built on first use (see nameindex.NameIndex)
+name_index = None
+
+# Number of people the last shortest_path search expanded
+steps = 0
+
+
+def load_data(directory, cache=True, workers=min(len(COLUMNS), os.cpu_count() or 1)):
     """
-    Load data from CSV files into memory.
+    Load data from CSV files into memory,
+    parsing them in up to workers processes.
+
+    With cache, everything loaded is also written to a binary snapshot
+    in the directory, which later runs map straight into memory for as
+    long as the CSV files keep their sizes and modification times.
+
+    Anything loaded before, and everything computed from it, is dropped first.
     """
-    # Load people
-    with open(f"{directory}/people.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            people[row["id"]] = {
-                "name": row["name"],
-                "birth": row["birth"],
-                "movies": set()
-            }
-            if row["name"].lower() not in names:
-                names[row["name"].lower()] = {row["id"]}
-            else:
-                names[row["name"].lower()].add(row["id"])
-
-    # Load movies
-    with open(f"{directory}/movies.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
-        for row in reader:
-            movies[row["id"]] = {
-                "title": row["title"],
-                "year": row["year"],
-                "stars": set()
-            }
-
-    # Load stars
-    with open(f"{directory}/stars.csv", encoding="utf-8") as f:
-        reader = csv.DictReader(f)
+    clear_data()
+
+    files = [f"{directory}/{name}.csv" for name in COLUMNS]
+    key = snapshot.file_key(files) + [SNAPSHOT_VERSION]
+    path = os.path.join(directory, SNAPSHOT)
+    if cache:
+        sections = snapshot.load(path, key)
+        if sections is not None:
+            load_snapshot(sections)
+            return
+
+    # Parse the three files at the same time
+    tasks = [(f"{directory}/{name}.csv", fields) for name, fields in COLUMNS.items()]
+    if workers > 1:
+        with multiprocessing.Pool(min(workers, len(tasks))) as pool:
+            results = [
+                [column.split("\0")[:-1] for column in columns]
+                for columns in pool.starmap(read_packed, tasks)
+            ]
+    else:
+        results = [read_columns(*task) for task in tasks]
+    person_columns, movie_columns, star_columns = results
+
+    fill_tables(person_columns, movie_columns)
+
+    # Credits on integer ids, without those of unknown people or movies
+    credit_people = list(map(person_index.get, star_columns[0]))
+    credit_movies = list(map(movie_index.get, star_columns[1]))
+    if None in credit_people or None in credit_movies:
+        credits = [
+            (person, movie) for person, movie in zip(credit_people, credit_movies)
+            if person is not None and movie is not None
+        ]
+        credit_people = [person for person, _ in credits]
+        credit_movies = [movie for _, movie in credits]
+    credit_people = array("i", credit_people)
+    credit_movies = array("i", credit_movies)
+
+    global graph
+    graph = Graph.from_pairs(len(person_ids), len(movie_ids), credit_people, credit_movies)
+
+    if cache:
+        try:
+            save_snapshot(path, key)
+        except OSError:
+            pass # the snapshot only saves time, loading still worked
+
+
+def clear_data():
+    """
+    Empties the tables and drops the graph and everything cached from them.
+    """
+    columns = (person_ids, person_names, person_births, movie_ids, movie_titles, movie_years)
+    for column in columns:
+        column.clear()
+    person_index.clear()
+    movie_index.clear()
+    names.assign([], array("q"), array("i"))
+    year_masks.clear()
+    trees.clear()
+
+    global years, movies_by_year, graph, landmarks, name_index
+    years = array("i")
+    movies_by_year = array("i")
+    graph = None
+    landmarks = None
+    name_index = None
+
+
+def read_columns(path, fields):
+    """
+    Returns the named columns of a CSV file as lists of strings,
+    appended to row by row while the file is read.
+
+    Blank lines are skipped; a row too short to hold every field
+    raises a ValueError naming the file and line.
+    """
+    with open(path, encoding="utf-8", newline="") as f:
+        reader = csv.reader(f)
+        header = next(reader, [])
+        positions = [header.index(field) for field in fields]
+        width = max(positions) + 1
+        columns = [[] for _ in positions]
+        appends = [(column.append, position) for column, position in zip(columns, positions)]
         for row in reader:
-            try:
-                people[row["person_id"]]["movies"].add(row["movie_id"])
-                movies[row["movie_id"]]["stars"].add(row["person_id"])
-            except KeyError:
-                pass
+            if len(row) < width:
+                if not row:
+                    continue
+                raise ValueError(f"{path}, line {reader.line_num}: expected {len(header)} fields, found {len(row)}")
+            for append, position in appends:
+                append(row[position])
+    return columns
+
+
+def read_packed(path, fields):
+    """
+    Returns the columns of read_columns each as one string with every
+    value followed by a NUL character.
+
+    Runs in the load_data worker processes: one string per column is
+    far cheaper to send back than a list of millions of small ones.
+    """
+    return ["\0".join(column + [""]) for column in read_columns(path, fields)]
+
+
+def fill_tables(person_columns, movie_columns):
+    """
+    Fills the columns, integer ids and names from the id, name and
+    birth columns of people and the id, title and year columns of movies.
+    """
+    number_rows(person_columns, person_index, (person_ids, person_names, person_births))
+    number_rows(movie_columns, movie_index, (movie_ids, movie_titles, movie_years))
+    names.fill(person_names)
+
+    # Index the movies by year
+    global years, movies_by_year
+    dated = sorted((int(year), n) for n, year in enumerate(movie_years) if year.isdigit())
+    years = array("i", (year for year, _ in dated))
+    movies_by_year = array("i", (movie for _, movie in dated))
+
+
+def number_rows(columns, index, tables):
+    """
+    Appends columns (ids first) to the tables on integer ids and
+    fills index. An id read more than once keeps its last row.
+    """
+    ids = columns[0]
+    index.update(zip(ids, range(len(ids))))
+    if len(index) < len(ids):
+        rows = sorted(index.values())
+        columns = [[column[n] for n in rows] for column in columns]
+        index.clear()
+        index.update(zip(columns[0], range(len(rows))))
+    for table, column in zip(tables, columns):
+        table.extend(column)
+
+
+def save_snapshot(path, key):
+    """
+    Writes the loaded tables, indexes and graph to a snapshot file.
+    """
+    snapshot.save(path, key, {
+        "person_ids": person_ids,
+        "person_names": person_names,
+        "person_births": person_births,
+        "movie_ids": movie_ids,
+        "movie_titles": movie_titles,
+        "movie_years": movie_years,
+        "name_keys": names.keys,
+        "name_offsets": names.offsets,
+        "name_people": names.people,
+        "years": years,
+        "movies_by_year": movies_by_year,
+        "person_offsets": graph.person_offsets,
+        "person_movies": graph.person_movies,
+        "movie_offsets": graph.movie_offsets,
+        "movie_people": graph.movie_people,
+    })
+
+
+def load_snapshot(sections):
+    """
+    Fills the tables from snapshot sections.
+
+    Only whole columns are copied: the integer ids come from one
+    dict(zip()) per table, and the name, year and graph arrays stay
+    memory-mapped, so nothing is done person by person in Python.
+    """
+    columns = (
+        (person_ids, "person_ids"), (person_names, "person_names"), (person_births, "person_births"),
+        (movie_ids, "movie_ids"), (movie_titles, "movie_titles"), (movie_years, "movie_years"),
+    )
+    for column, name in columns:
+        column.extend(sections[name])
+    person_index.update(zip(person_ids, range(len(person_ids))))
+    movie_index.update(zip(movie_ids, range(len(movie_ids))))
+    names.assign(sections["name_keys"], sections["name_offsets"], sections["name_people"])
+
+    global years, movies_by_year, graph
+    years = sections["years"]
+    movies_by_year = sections["movies_by_year"]
+    graph = Graph(
+        sections["person_offsets"], sections["person_movies"],
+        sections["movie_offsets"], sections["movie_people"]
+    )
+
+
+def load_landmarks(directory, count=LANDMARKS, cache=True):
+    """
+    Precomputes the distances from count landmark people to everyone,
+    after load_data. With cache, they are kept in a snapshot next to
+    the data snapshot and reused while the CSV files are unchanged.
+    """
+    files = [f"{directory}/{name}.csv" for name in COLUMNS]
+    key = snapshot.file_key(files) + [SNAPSHOT_VERSION, count]
+    path = os.path.join(directory, LANDMARKS_SNAPSHOT)
+
+    global landmarks
+    if cache:
+        sections = snapshot.load(path, key)
+        if sections is not None:
+            landmarks = Landmarks(sections["people"], sections["distances"])
+            return
+
+    landmarks = Landmarks.build(graph, count)
+    if cache:
+        try:
+            snapshot.save(path, key, {
+                "people": landmarks.people,
+                "distances": landmarks.distances,
+            })
+        except OSError:
+            pass # the snapshot only saves time
 
 
 def main():
@@ -70,6 +331,7 @@ def main():
         sys.exit("Person not found.")
 
     path = shortest_path(source, target)
+    print(f"Steps: {steps}")
 
     if path is None:
         print("Not connected.")
@@ -84,78 +346,352 @@ def main():
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, first=None, last=None):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
-    
+
+    With first or last, only movies from those years (inclusive)
+    are used; see year_mask.
+
+    Searches breadth-first from both people at once, always growing
+    the side with the smaller frontier, until the two sides meet.
+
+    If either person has a cached BFS tree (see bfs_tree), the path of
+    an unfiltered query is read off that tree instead.
+
+    Sets steps to the number of people expanded.
     If no possible path, returns None.
     """
-
-    # Create a step counter
+    global steps
     steps = 0
 
-    # Create the initial node
-    start = Node(state=source, parent=None, action=None)
-    frontier = QueueFrontier()
-    frontier.add(start)
+    # Search on integer ids
+    source = person_index[source]
+    target = person_index[target]
+    if source == target:
+        return []
+    filtered = first is not None or last is not None
+    if not filtered and (source in trees or target in trees):
+        return tree_path(source, target)
+
+    # Each side maps the people it reached to the person one step
+    # closer to where that side started, and to the movie they share
+    parents = ({source: source}, {target: target})
+    via = ({}, {})
+    frontiers = [[source], [target]]
+
+    # Movies whose stars a side has already gone through; those a filter
+    # excludes start out done, so they cost nothing extra to skip
+    if filtered:
+        mask = year_mask(first, last)
+        done = (bytearray(mask), bytearray(mask))
+    else:
+        done = (bytearray(graph.num_movies), bytearray(graph.num_movies))
+
+    while frontiers[0] and frontiers[1]:
+
+        # Expand the smaller frontier by one whole layer
+        side = 0 if len(frontiers[0]) <= len(frontiers[1]) else 1
+        reached, other = parents[side], parents[1 - side]
+        layer = []
+        for person in frontiers[side]:
+            steps += 1
+            for movie in graph.movies_of(person):
+                if done[side][movie]:
+                    continue
+                done[side][movie] = 1
+                for costar in graph.people_in(movie):
+                    if costar in reached:
+                        continue
+
+                    # The first meeting is a shortest path: until then the two
+                    # sides are disjoint, so the other side reached costar in
+                    # its newest layer
+                    if costar in other:
+                        if side == 0:
+                            return join_paths(parents, via, person, movie, costar)
+                        return join_paths(parents, via, costar, movie, person)
+
+                    reached[costar] = person
+                    via[side][costar] = movie
+                    layer.append(costar)
+        frontiers[side] = layer
+
+    return None
+
 
-    # Create an empty explored set
-    explored = set()
-    count = 0
+def join_paths(parents, via, person, movie, costar):
+    """
+    Returns the (movie_id, person_id) path from the source to person,
+    across movie to costar, and from costar on to the target.
+    """
+    return external_path(
+        trace(parents[0], via[0], person)
+        + [(movie, costar)]
+        + trace(parents[1], via[1], costar, backwards=True)
+    )
+
+
+def external_path(path):
+    """
+    Returns a path of (movie, person) integer ids as (movie_id, person_id) pairs.
+    """
+    return [(movie_ids[movie], person_ids[person]) for movie, person in path]
+
+
+def shortest_path_dag(source, target, first=None, last=None):
+    """
+    Returns every shortest path between two people as a
+    pathdag.PathDAG on integer ids, from a single breadth-first search,
+    or None if there is no path. first and last filter years like in
+    shortest_path.
+
+    The search stops as soon as it reaches the target; only the
+    target's own parents are completed after that.
+    """
+    source = person_index[source]
+    target = person_index[target]
+    if source == target:
+        return PathDAG(source, target, {}, {}, {source: 1}, {})
+    skip = year_mask(first, last) if first is not None or last is not None else None
+
+    depth = {source: 0}
+    counts = {source: 1}
+    person_parents = {}
+    movie_parents = {}
+    movie_counts = {}
+
+    layer = [source]
+    level = 0
+    while layer:
+        following = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if movie in movie_parents or (skip is not None and skip[movie]):
+                    continue
+
+                # Split the stars into this level and the next in one pass
+                parents = []
+                children = []
+                for costar in graph.people_in(movie):
+                    reached = depth.get(costar)
+                    if reached == level:
+                        parents.append(costar)
+                    elif reached is None:
+                        depth[costar] = level + 1
+                        person_parents[costar] = []
+                        counts[costar] = 0
+                        following.append(costar)
+                        children.append(costar)
+                    elif reached == level + 1:
+                        children.append(costar)
+
+                count = sum(counts[parent] for parent in parents)
+                movie_parents[movie] = parents
+                movie_counts[movie] = count
+                for costar in children:
+                    person_parents[costar].append(movie)
+                    counts[costar] += count
+
+            if target in depth:
+                # The rest of the layer only matters through the target's movies
+                parents = []
+                for movie in graph.movies_of(target):
+                    if skip is not None and skip[movie]:
+                        continue
+                    if movie not in movie_parents:
+                        movie_parents[movie] = [
+                            costar for costar in graph.people_in(movie) if depth.get(costar) == level
+                        ]
+                        movie_counts[movie] = sum(counts[costar] for costar in movie_parents[movie])
+                    if movie_parents[movie]:
+                        parents.append(movie)
+                person_parents[target] = parents
+                counts[target] = sum(movie_counts[movie] for movie in parents)
+                return PathDAG(source, target, person_parents, movie_parents, counts, movie_counts)
+
+        layer = following
+        level += 1
+
+    return None
+
+
+def all_shortest_paths(source, target, first=None, last=None):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs that
+    connect the source to the target, one at a time, all from one search.
+    """
+    dag = shortest_path_dag(source, target, first, last)
+    if dag is not None:
+        for path in dag:
+            yield external_path(path)
+
+
+def sample_shortest_paths(source, target, k, seed=None, first=None, last=None):
+    """
+    Returns k shortest lists of (movie_id, person_id) pairs connecting
+    the source to the target, drawn uniformly at random (with repeats)
+    from one search, or None if there is no path.
+    """
+    dag = shortest_path_dag(source, target, first, last)
+    if dag is None:
+        return None
+    return [external_path(path) for path in dag.sample(k, seed)]
+
+
+def year_mask(first=None, last=None):
+    """
+    Returns a bytearray over integer movie ids with 1 for every movie
+    not from the years first to last (inclusive, None for no bound).
+    Movies without a year never match a filter.
+
+    Masks are cached for the YEAR_MASKS most recently used filters.
+    """
+    key = (first, last)
+    if key in year_masks:
+        year_masks.move_to_end(key)
+        return year_masks[key]
 
-    # Keep looping until solution found
-    while True:
+    start = 0 if first is None else bisect_left(years, first)
+    end = len(years) if last is None else bisect_right(years, last)
+    mask = bytearray([1]) * len(movie_ids)
+    for movie in movies_by_year[start:end]:
+        mask[movie] = 0
 
-        count += 1
+    year_masks[key] = mask
+    if len(year_masks) > YEAR_MASKS:
+        year_masks.popitem(last=False)
+    return mask
 
-        # If nothing left in the frontier, then no path
-        if frontier.empty():
+
+def bfs_tree(source):
+    """
+    Returns the BFS tree of everyone reachable from the source,
+    as two arrays on integer person ids: parents[n] is the person one
+    step nearer the source and movies[n] the movie they share
+    (-1 for people not reached, the source is its own parent).
+
+    Trees are cached, up to TREE_CACHE_BYTES, so that shortest_path
+    from or to the source only walks the tree.
+    """
+    source = person_index[source]
+    if source in trees:
+        trees.move_to_end(source)
+        return trees[source]
+
+    parents = array("i", [-1]) * graph.num_people
+    movies = array("i", [-1]) * graph.num_people
+    done = bytearray(graph.num_movies)
+    parents[source] = source
+    layer = [source]
+    while layer:
+        following = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if done[movie]:
+                    continue
+                done[movie] = 1
+                for costar in graph.people_in(movie):
+                    if parents[costar] == -1:
+                        parents[costar] = person
+                        movies[costar] = movie
+                        following.append(costar)
+        layer = following
+
+    # Make room, always keeping the newest tree
+    trees[source] = (parents, movies)
+    size = 2 * parents.itemsize * graph.num_people
+    while len(trees) > 1 and len(trees) * size > TREE_CACHE_BYTES:
+        trees.popitem(last=False)
+    return trees[source]
+
+
+def tree_path(source, target):
+    """
+    Returns the (movie_id, person_id) path between two integer person ids
+    read off a cached BFS tree of either, or None if they are not connected.
+    """
+    if source in trees:
+        trees.move_to_end(source)
+        parents, movies = trees[source]
+        if parents[target] == -1:
             return None
-        
-        # Choose a node from the frontier
-        node = frontier.remove()
-        currID = node.state # Get the current person ID
-
-        # If node is the goal, then we have a solution
-        if currID == target:
-            print(f"Steps: {count}")
-            actions = []
-            cells = []
-            while node.parent is not None:
-                actions.append(node.action)
-                cells.append(node.state)
-                node = node.parent
-            actions.reverse()
-            cells.reverse()
-            solution = list(zip(actions, cells))
-            return solution
-        
-        # Mark node as explored
-        explored.add(currID)
-
-        # Add neighbors to the frontier
-        for movie_id, person_id in neighbors_for_person(currID, target):
-            if person_id == target:
-                print(f"Steps: {count}")
-                node = Node(state=person_id, parent=node, action=movie_id)
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                solution = list(zip(actions, cells))
-                return solution
-            
-            elif not frontier.contains_state(person_id) and person_id not in explored:
-                child = Node(state=person_id, parent=node, action=movie_id)
-                frontier.add(child)
-
-    # TODO
-    raise NotImplementedError
+        return external_path(trace(parents, movies, target))
+
+    # The target's tree leads from the target, so walk it backwards
+    trees.move_to_end(target)
+    parents, movies = trees[target]
+    if parents[source] == -1:
+        return None
+    return external_path(trace(parents, movies, source, backwards=True))
+
+
+def landmark_path(source, target):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, like shortest_path.
+
+    Searches with A*, guided by the landmark lower bounds (load_landmarks
+    must have run). If no possible path, returns None.
+    """
+    source = person_index[source]
+    target = person_index[target]
+    if source == target:
+        return []
+    if not landmarks.connected(source, target):
+        return None
+    goal = landmarks.of(target)
+
+    # Maps the people reached to their degrees from the source,
+    # and to the person and movie they were reached from
+    reached = {source: 0}
+    parents = {source: source}
+    via = {}
+    closed = set()
+
+    # Degrees at which a movie's stars were last gone through
+    done = {}
+
+    # Ties go to the person with the smaller bound, who is likely nearer the target
+    bound = landmarks.lower_bound(source, goal)
+    frontier = [(bound, bound, source)]
+
+    while frontier:
+        _, _, person = heapq.heappop(frontier)
+        if person in closed:
+            continue
+        closed.add(person)
+        if person == target:
+            break
+
+        degrees = reached[person] + 1
+        for movie in graph.movies_of(person):
+            # Going through a movie again only helps from nearer the source
+            if done.get(movie, degrees + 1) <= degrees:
+                continue
+            done[movie] = degrees
+            for costar in graph.people_in(movie):
+                if costar in reached and reached[costar] <= degrees:
+                    continue
+                reached[costar] = degrees
+                parents[costar] = person
+                via[costar] = movie
+                bound = landmarks.lower_bound(costar, goal)
+                heapq.heappush(frontier, (degrees + bound, bound, costar))
+    else:
+        return None
+
+    return external_path(trace(parents, via, target))
+
+
+def approximate_degrees(source, target):
+    """
+    Returns (lower, upper) bounds on the degrees of separation between
+    two people from the landmark distances alone, without a search.
+    upper is None if unknown; both are None if they are not connected.
+    """
+    return landmarks.bounds(person_index[source], person_index[target])
 
 
 def person_id_for_name(name):
@@ -165,6 +701,9 @@ def person_id_for_name(name):
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        suggestions = fuzzy_names(name, limit=5)
+        if suggestions:
+            print(f"Did you mean: {', '.join(suggestions)}?")
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
@@ -184,20 +723,73 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
-def neighbors_for_person(person_id, goal):
+def person_for(field):
+    """
+    Returns the person_id a field names without asking: either a
+    person_id or a name that belongs to exactly one person.
+    Raises ValueError otherwise.
+    """
+    field = field.strip()
+    if field in people:
+        return field
+    matches = names.get(field.lower(), set())
+    if len(matches) == 1:
+        return next(iter(matches))
+    if matches:
+        raise ValueError(f"'{field}' is ambiguous: {', '.join(sorted(matches))}")
+    raise ValueError(f"'{field}' not found")
+
+
+def load_name_index():
+    """
+    Returns the name index, building it the first time.
+    Names are scored by the most movies of anyone with that name.
+    """
+    global name_index
+    if name_index is None:
+        keys = sorted(names)
+        scores = array("i", (max(map(movie_count, names[key])) for key in keys))
+        name_index = NameIndex(keys, scores)
+    return name_index
+
+
+def movie_count(person_id):
+    person = person_index[person_id]
+    return graph.person_offsets[person + 1] - graph.person_offsets[person]
+
+
+def display_name(key):
+    # The spelling of the best known person with that name
+    return people[max(names[key], key=movie_count)]["name"]
+
+
+def complete_name(prefix, limit=10):
+    """
+    Returns up to limit names that start with prefix (ignoring case),
+    those of people in more movies first.
+    """
+    return [display_name(key) for key in load_name_index().complete(prefix, limit)]
+
+
+def fuzzy_names(name, max_distance=2, limit=10):
+    """
+    Returns up to limit names at most max_distance edits away from name
+    (ignoring case), nearest first.
+    """
+    return [display_name(key) for _, key in load_name_index().fuzzy(name, max_distance, limit)]
+
+
+def neighbors_for_person(person_id, goal=None):
     """
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
-    movie_ids = people[person_id]["movies"]
     neighbors = set()
-    for movie_id in movie_ids:
-        for person_id in movies[movie_id]["stars"]:
-            if person_id == goal:
-                neighbors.add((movie_id, person_id))
+    for movie in graph.movies_of(person_index[person_id]):
+        for person in graph.people_in(movie):
+            neighbors.add((movie_ids[movie], person_ids[person]))
+            if person_ids[person] == goal:
                 return neighbors
-            else:
-                neighbors.add((movie_id, person_id))
     return neighbors
 
 
@@ -0,0 +1,69 @@
+from array import array
+
+
+class Graph():
+    """
+    Bipartite person <-> movie graph on dense integer ids, in CSR form.
+
+    The movies of person n are
+    person_movies[person_offsets[n]:person_offsets[n + 1]],
+    and the people in movie m are
+    movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+    """
+
+    def __init__(self, person_offsets, person_movies, movie_offsets, movie_people):
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+        self.num_people = len(person_offsets) - 1
+        self.num_movies = len(movie_offsets) - 1
+
+    @classmethod
+    def from_pairs(cls, num_people, num_movies, people, movies):
+        """
+        Builds the graph from parallel sequences of person and movie ids,
+        one entry per credit. Repeated credits are kept once.
+        """
+        # Sort the credits by person then movie, dropping repeats
+        keys = sorted(set(
+            person * num_movies + movie for person, movie in zip(people, movies)
+        ))
+
+        # Count the credits of every person and movie
+        person_offsets = array("q", [0]) * (num_people + 1)
+        movie_offsets = array("q", [0]) * (num_movies + 1)
+        person_movies = array("i", [0]) * len(keys)
+        for n, key in enumerate(keys):
+            person, movie = divmod(key, num_movies)
+            person_movies[n] = movie
+            person_offsets[person + 1] += 1
+            movie_offsets[movie + 1] += 1
+
+        # Running totals turn the counts into offsets
+        for n in range(num_people):
+            person_offsets[n + 1] += person_offsets[n]
+        for n in range(num_movies):
+            movie_offsets[n + 1] += movie_offsets[n]
+
+        # Place every person in the next free slot of their movie
+        movie_people = array("i", [0]) * len(keys)
+        slots = array("q", movie_offsets)
+        for key in keys:
+            person, movie = divmod(key, num_movies)
+            movie_people[slots[movie]] = person
+            slots[movie] += 1
+
+        return cls(person_offsets, person_movies, movie_offsets, movie_people)
+
+    def movies_of(self, person):
+        """
+        Returns the movie ids a person starred in.
+        """
+        return self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+
+    def people_in(self, movie):
+        """
+        Returns the person ids that starred in a movie.
+        """
+        return self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
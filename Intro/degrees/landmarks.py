@@ -0,0 +1,122 @@
+from array import array
+from operator import sub
+
+# Distance stored for people a landmark cannot reach
+UNREACHED = 255
+
+# Largest distance stored, farther people are stored at this distance too
+CAPPED = UNREACHED - 1
+
+
+class Landmarks():
+    """
+    Degrees of separation from a few landmark people to everyone (ALT).
+
+    The distances of person n to all landmarks are
+    distances[n * count:(n + 1) * count], one byte each. By the triangle
+    inequality, the degrees between two people are at least the largest
+    difference of their distances to any one landmark, and at most the
+    smallest sum of them.
+    """
+
+    def __init__(self, people, distances):
+        self.people = people
+        self.distances = distances
+        self.count = len(people)
+
+    @classmethod
+    def build(cls, graph, count):
+        """
+        Picks the count people with the most movies as landmarks and
+        searches breadth-first from each of them.
+        """
+        people = sorted(
+            range(graph.num_people),
+            key=lambda person: graph.person_offsets[person + 1] - graph.person_offsets[person],
+            reverse=True
+        )[:count]
+        people = array("i", people)
+        count = len(people)
+
+        distances = array("B", [UNREACHED]) * (graph.num_people * count)
+        for n, landmark in enumerate(people):
+            distances[n::count] = array("B", distances_from(graph, landmark))
+        return cls(people, distances)
+
+    def of(self, person):
+        """
+        Returns the distances from every landmark to a person.
+        """
+        return self.distances[person * self.count:(person + 1) * self.count]
+
+    def connected(self, source, target):
+        """
+        Returns False if some landmark reaches only one of the two people.
+        """
+        for a, b in zip(self.of(source), self.of(target)):
+            if (a == UNREACHED) != (b == UNREACHED):
+                return False
+        return True
+
+    def lower_bound(self, person, target):
+        """
+        Returns a number of degrees the person is at least away from
+        the target, given target = self.of(target).
+
+        Only meaningful for connected people, which any landmark either
+        reaches both or neither of.
+        """
+        if not self.count:
+            return 0
+        return max(map(abs, map(sub, self.of(person), target)))
+
+    def bounds(self, source, target):
+        """
+        Returns the (lower, upper) bounds on the degrees between two
+        people, without searching. upper is None if no landmark reaches
+        both of them within CAPPED degrees, and both are None if the two
+        are not connected.
+
+        A capped distance is smaller than the real one, which keeps the
+        lower bounds valid but could make a sum too small, so only
+        landmarks with both distances exact give an upper bound.
+        """
+        if not self.connected(source, target):
+            return None, None
+        lower, upper = 0, None
+        for a, b in zip(self.of(source), self.of(target)):
+            if a == UNREACHED:
+                continue
+            lower = max(lower, abs(a - b))
+            if a < CAPPED and b < CAPPED:
+                upper = a + b if upper is None else min(upper, a + b)
+        return lower, upper
+
+
+def distances_from(graph, source):
+    """
+    Returns the degrees from source to every person as bytes,
+    UNREACHED for people in other components.
+
+    Distances beyond what a byte holds are capped, which keeps them
+    valid for the lower bounds.
+    """
+    distances = bytearray([UNREACHED]) * graph.num_people
+    done = bytearray(graph.num_movies)
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth = min(depth + 1, CAPPED)
+        following = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if done[movie]:
+                    continue
+                done[movie] = 1
+                for costar in graph.people_in(movie):
+                    if distances[costar] == UNREACHED:
+                        distances[costar] = depth
+                        following.append(costar)
+        layer = following
+    return distances
@@ -0,0 +1,130 @@
+import heapq
+from array import array
+from bisect import bisect_left
+
+
+class NameIndex():
+    """
+    Sorted array of lowercase names with a score for each,
+    for ranked prefix completion and fuzzy (edit distance) matching.
+
+    tree is a segment tree over the scores: tree[size + n] is n, and
+    every inner node holds the best-scored position below it, so the
+    best names in any range of keys come out without scanning it.
+    """
+
+    def __init__(self, keys, scores):
+        self.keys = keys
+        self.scores = scores
+        self.size = len(keys)
+
+        self.tree = array("i", [0]) * (2 * self.size)
+        for n in range(self.size):
+            self.tree[self.size + n] = n
+        for node in range(self.size - 1, 0, -1):
+            self.tree[node] = self.better(self.tree[2 * node], self.tree[2 * node + 1])
+
+    def better(self, a, b):
+        # Higher scores first, then alphabetical
+        return a if self.scores[a] > self.scores[b] or (self.scores[a] == self.scores[b] and a < b) else b
+
+    def range_of(self, prefix):
+        """
+        Returns the range of positions of the keys that start with prefix.
+        """
+        start = bisect_left(self.keys, prefix)
+        if not prefix:
+            return start, self.size
+        return start, bisect_left(self.keys, prefix[:-1] + chr(ord(prefix[-1]) + 1), start)
+
+    def complete(self, prefix, limit=10):
+        """
+        Returns up to limit keys that start with prefix, best scored first.
+        """
+        start, end = self.range_of(prefix.lower())
+
+        # Nodes that together cover the range exactly
+        frontier = []
+        low, high = start + self.size, end + self.size
+        while low < high:
+            if low & 1:
+                frontier.append(self.entry(low))
+                low += 1
+            if high & 1:
+                high -= 1
+                frontier.append(self.entry(high))
+            low //= 2
+            high //= 2
+        heapq.heapify(frontier)
+
+        # Best-first down the tree: a node's best is never beaten below it
+        found = []
+        while frontier and len(found) < limit:
+            _, best, node = heapq.heappop(frontier)
+            if node >= self.size:
+                found.append(self.keys[best])
+            else:
+                heapq.heappush(frontier, self.entry(2 * node))
+                heapq.heappush(frontier, self.entry(2 * node + 1))
+        return found
+
+    def entry(self, node):
+        best = self.tree[node]
+        return (-self.scores[best], best, node)
+
+    def fuzzy(self, query, max_distance=2, limit=10):
+        """
+        Returns up to limit (distance, key) pairs for the keys within
+        max_distance edits of query, nearest and then best scored first.
+
+        Walks the sorted keys like a trie: the edit distance rows of a
+        shared prefix are reused, and once every entry of a prefix's row
+        is over max_distance, all keys with that prefix are skipped.
+        """
+        query = query.lower()
+        rows = [list(range(len(query) + 1))] # rows[depth] belongs to previous[:depth]
+        previous = ""
+        found = []
+        n = 0
+        while n < self.size:
+            key = self.keys[n]
+
+            # Keep the rows of the prefix shared with the previous key
+            depth = 0
+            while depth < len(previous) and depth < len(key) and previous[depth] == key[depth]:
+                depth += 1
+            del rows[depth + 1:]
+
+            pruned = False
+            while depth < len(key):
+                rows.append(next_row(rows[depth], key[depth], query))
+                depth += 1
+                if min(rows[depth]) > max_distance:
+                    pruned = True
+                    break
+            previous = key[:depth]
+
+            if pruned:
+                n = self.range_of(previous)[1]
+                continue
+            if rows[depth][-1] <= max_distance:
+                found.append((rows[depth][-1], -self.scores[n], key))
+            n += 1
+
+        found.sort()
+        return [(distance, key) for distance, _, key in found[:limit]]
+
+
+def next_row(row, char, query):
+    """
+    Returns the edit distances from query's prefixes to a key prefix
+    one char longer than the one row belongs to.
+    """
+    following = [row[0] + 1]
+    for n, other in enumerate(query):
+        following.append(min(
+            row[n + 1] + 1, # char deleted
+            following[n] + 1, # other inserted
+            row[n] + (char != other) # char replaced, or kept
+        ))
+    return following
@@ -0,0 +1,65 @@
+import random
+
+
+class PathDAG():
+    """
+    Every shortest path between two people, on integer ids, as the
+    layered DAG a breadth-first search leaves behind.
+
+    person_parents maps people to the movies that lead to them from
+    the layer before, and movie_parents maps those movies to the people
+    of the layer before that are in them. counts and movie_counts hold
+    how many shortest paths from the source end in each person and movie.
+    """
+
+    def __init__(self, source, target, person_parents, movie_parents, counts, movie_counts):
+        self.source = source
+        self.target = target
+        self.person_parents = person_parents
+        self.movie_parents = movie_parents
+        self.counts = counts
+        self.movie_counts = movie_counts
+
+    @property
+    def count(self):
+        """
+        Number of shortest paths from the source to the target.
+        """
+        return self.counts[self.target]
+
+    def __iter__(self):
+        """
+        Yields the shortest paths one at a time, each a list of
+        (movie, person) steps from the source to the target.
+        """
+        return self.paths_to(self.target)
+
+    def paths_to(self, person):
+        if person == self.source:
+            yield []
+            return
+        for movie in self.person_parents[person]:
+            for parent in self.movie_parents[movie]:
+                for path in self.paths_to(parent):
+                    yield path + [(movie, person)]
+
+    def sample(self, k, seed=None):
+        """
+        Returns k shortest paths drawn uniformly at random (with repeats),
+        by walking back from the target and picking every movie and
+        person in proportion to the paths through it.
+        """
+        chooser = random.Random(seed)
+        samples = []
+        for _ in range(k):
+            path = []
+            person = self.target
+            while person != self.source:
+                movies = self.person_parents[person]
+                movie = chooser.choices(movies, [self.movie_counts[movie] for movie in movies])[0]
+                path.append((movie, person))
+                parents = self.movie_parents[movie]
+                person = chooser.choices(parents, [self.counts[parent] for parent in parents])[0]
+            path.reverse()
+            samples.append(path)
+        return samples
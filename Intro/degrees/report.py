@@ -0,0 +1,116 @@
+import argparse
+import json
+import random
+import sys
+
+import degrees
+from landmarks import CAPPED, UNREACHED
+
+# Sources searched together, one bit each of a 64-bit word per person
+BATCH = 64
+
+
+def distance_matrix(sources):
+    """
+    Returns the degrees from every source (integer person ids) to every
+    person, one uint8 row per source, UNREACHED for people not connected.
+
+    Searches level by level for BATCH sources at once: every person holds
+    a word with a bit per source, and one level is two OR-reductions over
+    the person x movie incidence matrix (people to movies, movies to
+    people) instead of a loop over people.
+    """
+    import numpy as np
+
+    graph = degrees.graph
+    person_offsets = np.frombuffer(graph.person_offsets, dtype=np.int64)
+    person_movies = np.frombuffer(graph.person_movies, dtype=np.int32)
+    movie_offsets = np.frombuffer(graph.movie_offsets, dtype=np.int64)
+    movie_people = np.frombuffer(graph.movie_people, dtype=np.int32)
+
+    distances = np.full((len(sources), graph.num_people), UNREACHED, dtype=np.uint8)
+    for start in range(0, len(sources), BATCH):
+        batch = np.asarray(sources[start:start + BATCH], dtype=np.int64)
+        rows = distances[start:start + len(batch)]
+        bits = np.left_shift(np.uint64(1), np.arange(len(batch), dtype=np.uint64))
+
+        frontier = np.zeros(graph.num_people, dtype=np.uint64)
+        np.bitwise_or.at(frontier, batch, bits)
+        visited = frontier.copy()
+        level = 0
+        while frontier.any():
+            for row, bit in zip(rows, bits):
+                row[(frontier & bit) != 0] = level
+
+            # Distances beyond a byte are capped, like the landmark distances
+            level = min(level + 1, CAPPED)
+            movies = segment_or(np, frontier[movie_people], movie_offsets)
+            frontier = segment_or(np, movies[person_movies], person_offsets) & ~visited
+            visited |= frontier
+
+    return distances
+
+
+def segment_or(np, values, offsets):
+    """
+    Returns the OR of values[offsets[n]:offsets[n + 1]] for every n,
+    0 for empty segments.
+    """
+    counts = np.diff(offsets)
+    result = np.zeros(len(counts), dtype=values.dtype)
+    filled = counts > 0
+    if len(values):
+        # Without the empty segments, every segment ends where the next one starts
+        result[filled] = np.bitwise_or.reduceat(values, offsets[:-1][filled])
+    return result
+
+
+def summary(row):
+    """
+    Returns the statistics of one source's distances: how many people
+    it reaches, its eccentricity and the number of people at every degree.
+    """
+    import numpy as np
+
+    reached = row[row != UNREACHED]
+    histogram = np.bincount(reached)
+    return {
+        "reached": int(len(reached)),
+        "unreachable": int(len(row) - len(reached)),
+        "eccentricity": int(len(histogram) - 1),
+        "mean": round(float(reached.mean()), 4),
+        "histogram": histogram.tolist(),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Report the degrees from sources to everyone, one JSON line per source and a total."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("sources", nargs="*", help="person ids or names")
+    parser.add_argument("-r", "--random", type=int, default=0, help="also use this many random people as sources")
+    parser.add_argument("--seed", type=int, help="seed for the random sources")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    try:
+        sources = [degrees.person_for(source) for source in args.sources]
+    except ValueError as e:
+        sys.exit(str(e))
+    sources += random.Random(args.seed).sample(degrees.person_ids, args.random)
+    if not sources:
+        sys.exit("No sources: name some people or use --random.")
+
+    distances = distance_matrix([degrees.person_index[source] for source in sources])
+    for source, row in zip(sources, distances):
+        print(json.dumps({"source": source, "name": degrees.people[source]["name"], **summary(row)}))
+
+    print(json.dumps({"sources": len(sources), **summary(distances.ravel())}))
+
+
+if __name__ == "__main__":
+    main()
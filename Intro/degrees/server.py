@@ -0,0 +1,156 @@
+import argparse
+import asyncio
+import contextlib
+import csv
+import json
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import degrees
+
+# Queries of one stream answered at once; reading waits while this many are pending
+MAX_PENDING = 64
+
+
+def answer(line):
+    """
+    Answers one query line, "source,target", with a result dictionary.
+
+    Runs in the worker processes, which have the data loaded already.
+    """
+    result = {"query": line}
+    try:
+        fields = next(csv.reader([line]))
+        if len(fields) != 2:
+            raise ValueError("expected source,target")
+        source, target = degrees.person_for(fields[0]), degrees.person_for(fields[1])
+    except ValueError as e:
+        result["error"] = str(e)
+        return result
+
+    path = degrees.shortest_path(source, target)
+
+    result["source"] = source
+    result["target"] = target
+    result["degrees"] = None if path is None else len(path)
+    result["path"] = path
+    return result
+
+
+def start_worker(directory):
+    # Forked workers inherit the loaded data, spawned ones load their own
+    if degrees.graph is None:
+        degrees.load_data(directory)
+
+
+async def serve_lines(lines, write, pool):
+    """
+    Answers every line that the lines coroutine hands out (until it
+    returns None), several at once, passing each reply line to write.
+
+    Replies come back in the order they finish, not the order asked.
+    A query that fails for any reason gets a reply with an error.
+    """
+    loop = asyncio.get_running_loop()
+    pending = set()
+    slots = asyncio.Semaphore(MAX_PENDING)
+
+    async def reply(line):
+        try:
+            try:
+                result = await loop.run_in_executor(pool, answer, line)
+            except Exception as e:
+                # e.g. a worker process died and broke the pool
+                result = {"query": line, "error": f"{type(e).__name__}: {e}"}
+            await write(json.dumps(result) + "\n")
+        except ConnectionError:
+            pass # the client went away, reading its next line ends the loop
+        finally:
+            slots.release()
+
+    while (line := await lines()) is not None:
+        line = line.strip()
+        if not line:
+            continue
+        await slots.acquire()
+        task = asyncio.create_task(reply(line))
+        pending.add(task)
+        task.add_done_callback(pending.discard)
+
+    if pending:
+        await asyncio.wait(pending)
+
+
+async def serve_stdio(pool):
+    """
+    Answers queries from stdin on stdout until stdin ends.
+    """
+    loop = asyncio.get_running_loop()
+
+    async def lines():
+        # stdin may be a file, which asyncio cannot watch, so read it on a thread
+        line = await loop.run_in_executor(None, sys.stdin.readline)
+        return line or None
+
+    async def write(text):
+        sys.stdout.write(text)
+        sys.stdout.flush()
+
+    await serve_lines(lines, write, pool)
+
+
+async def serve_socket(path, pool):
+    """
+    Answers queries from any number of clients on a Unix socket at path.
+    """
+    async def client(reader, writer):
+        async def lines():
+            line = await reader.readline()
+            return line.decode("utf-8") or None
+
+        async def write(text):
+            writer.write(text.encode("utf-8"))
+            await writer.drain()
+
+        try:
+            await serve_lines(lines, write, pool)
+        except ConnectionError:
+            pass # the client went away
+        finally:
+            writer.close()
+
+    # A socket file left behind by an earlier server would block the bind
+    with contextlib.suppress(FileNotFoundError):
+        os.unlink(path)
+    server = await asyncio.start_unix_server(client, path)
+    print(f"Listening on {path}", file=sys.stderr)
+    async with server:
+        await server.serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Load the data once and answer source,target queries, one JSON line each."
+    )
+    parser.add_argument("directory", nargs="?", default="large")
+    parser.add_argument("-s", "--socket", help="Unix socket to listen on (default: stdin and stdout)")
+    parser.add_argument("-j", "--workers", type=int, default=os.cpu_count(), help="number of worker processes")
+    args = parser.parse_args()
+
+    print("Loading data...", file=sys.stderr)
+    degrees.load_data(args.directory)
+    print("Data loaded.", file=sys.stderr)
+
+    with ProcessPoolExecutor(args.workers, initializer=start_worker, initargs=(args.directory,)) as pool:
+        try:
+            if args.socket:
+                asyncio.run(serve_socket(args.socket, pool))
+            else:
+                asyncio.run(serve_stdio(pool))
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,105 @@
+import json
+import mmap
+import os
+import sys
+
+# First bytes of every snapshot file
+MAGIC = b"DEGSNAP1"
+
+
+def file_key(paths):
+    """
+    Returns what a snapshot of the given files is valid for:
+    their sizes and modification times.
+    """
+    key = []
+    for path in paths:
+        stat = os.stat(path)
+        key.append([os.path.basename(path), stat.st_size, stat.st_mtime_ns])
+    return key
+
+
+def save(path, key, sections):
+    """
+    Writes sections to a snapshot file at path.
+
+    sections maps names to arrays (stored as raw machine values)
+    or to lists of strings (stored as one UTF-8 blob).
+    The file is written next to path first and then moved into place.
+    """
+    header = {"key": key, "byteorder": sys.byteorder, "sections": {}}
+    blobs = []
+    offset = 0
+    for name, values in sections.items():
+        if isinstance(values, list):
+            blob = "\0".join(values).encode("utf-8")
+            header["sections"][name] = [offset, len(blob), "str", len(values)]
+        else:
+            blob = bytes(values)
+            header["sections"][name] = [offset, len(blob), values.typecode, len(values)]
+        blobs.append(blob)
+
+        # Keep every section 8-byte aligned for memoryview.cast
+        offset += len(blob) + (-len(blob)) % 8
+
+    encoded = json.dumps(header).encode("utf-8")
+    encoded += b" " * ((-len(encoded)) % 8)
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(MAGIC)
+        f.write(len(encoded).to_bytes(8, "little"))
+        f.write(encoded)
+        for blob in blobs:
+            f.write(blob)
+            f.write(b"\0" * ((-len(blob)) % 8))
+    os.replace(temporary, path)
+
+
+def load(path, key):
+    """
+    Returns the sections of the snapshot at path, or None if there is
+    no snapshot or it was made for different files (key).
+
+    The file is memory-mapped: arrays come back as memoryviews of it,
+    cast to their type, and are never copied. Strings come back as lists.
+    A file that is cut short or damaged also returns None.
+    """
+    try:
+        f = open(path, "rb")
+    except OSError:
+        return None
+    with f:
+        if os.fstat(f.fileno()).st_size < len(MAGIC) + 8:
+            return None
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    try:
+        return read_sections(mapped, key)
+    except (ValueError, KeyError, TypeError):
+        return None # a damaged file is rebuilt like a stale one
+
+
+def read_sections(mapped, key):
+    # The sections of a mapped snapshot file, None if any of them do not add up
+    if mapped[:len(MAGIC)] != MAGIC:
+        return None
+    length = int.from_bytes(mapped[len(MAGIC):len(MAGIC) + 8], "little")
+    start = len(MAGIC) + 8
+    header = json.loads(mapped[start:start + length])
+    if header["key"] != key or header["byteorder"] != sys.byteorder:
+        return None
+
+    data = memoryview(mapped)[start + length:]
+    sections = {}
+    for name, (offset, size, typecode, count) in header["sections"].items():
+        view = data[offset:offset + size]
+        if offset < 0 or len(view) != size:
+            return None
+        if typecode == "str":
+            values = str(view, "utf-8").split("\0") if count else []
+        else:
+            values = view.cast(typecode)
+        if len(values) != count:
+            return None
+        sections[name] = values
+    return sections
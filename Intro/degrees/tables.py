@@ -0,0 +1,98 @@
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+
+
+class Table(Mapping):
+    """
+    Read-only view of columns on integer ids as a mapping of
+    ids to row dictionaries.
+
+    index maps ids to their integer ids, and the value of field
+    fields[k] for integer id n is columns[k][n]. Rows are built on
+    lookup, so the table holds nothing per row but the columns.
+    """
+
+    def __init__(self, index, fields, columns):
+        self.index = index
+        self.fields = fields
+        self.columns = columns
+
+    def __getitem__(self, key):
+        n = self.index[key]
+        return {field: column[n] for field, column in zip(self.fields, self.columns)}
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def __iter__(self):
+        return iter(self.index)
+
+    def __len__(self):
+        return len(self.index)
+
+
+class NameTable(Mapping):
+    """
+    Read-only mapping of lowercase names to the set of person_ids
+    with that name, over sorted arrays instead of a set per name.
+
+    keys is the sorted list of names, and the integer ids of the people
+    named keys[n] are people[offsets[n]:offsets[n + 1]]; ids maps
+    those to person_ids.
+    """
+
+    def __init__(self, keys, offsets, people, ids):
+        self.keys = keys
+        self.offsets = offsets
+        self.people = people
+        self.ids = ids
+
+    def fill(self, names):
+        """
+        Replaces the contents with the names of integer ids 0, 1, ...
+        """
+        lowered = [name.lower() for name in names]
+        order = sorted(range(len(lowered)), key=lowered.__getitem__)
+
+        keys = []
+        offsets = array("q")
+        for position, n in enumerate(order):
+            if not keys or keys[-1] != lowered[n]:
+                keys.append(lowered[n])
+                offsets.append(position)
+        offsets.append(len(order))
+        self.assign(keys, offsets, array("i", order))
+
+    def assign(self, keys, offsets, people):
+        """
+        Replaces the contents with sorted keys and the offsets and
+        people arrays of another NameTable, e.g. from a snapshot.
+        """
+        self.keys = keys
+        self.offsets = offsets
+        self.people = people
+
+    def integer_ids(self, key):
+        """
+        Returns the integer ids of the people named key, empty if none are.
+        """
+        n = bisect_left(self.keys, key)
+        if n == len(self.keys) or self.keys[n] != key:
+            return self.people[0:0]
+        return self.people[self.offsets[n]:self.offsets[n + 1]]
+
+    def __getitem__(self, key):
+        people = self.integer_ids(key)
+        if not people:
+            raise KeyError(key)
+        return {self.ids[person] for person in people}
+
+    def __contains__(self, key):
+        return len(self.integer_ids(key)) > 0
+
+    def __iter__(self):
+        return iter(self.keys)
+
+    def __len__(self):
+        return len(self.keys)
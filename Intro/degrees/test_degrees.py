@@ -0,0 +1,376 @@
+import csv
+import random
+from collections import deque
+
+import pytest
+
+import degrees
+import snapshot
+from graph import Graph
+from nameindex import NameIndex
+
+SEEDS = range(20)
+
+FIRST_NAMES = ["Ann", "Anna", "Bob", "Bo", "Kevin", "Kevyn", "Tom", "Tomas"]
+LAST_NAMES = ["Bacon", "Baker", "Hanks", "Hank", "Ryan"]
+
+
+def write_data(directory, seed):
+    """
+    Writes random people, movies and stars CSV files to directory and
+    returns the credits as (person_id, movie_id) pairs.
+    """
+    chooser = random.Random(seed)
+    num_people = chooser.randint(2, 60)
+    num_movies = chooser.randint(1, 40)
+    person_ids = [str(100 + n) for n in range(num_people)]
+    movie_ids = [str(900 + n) for n in range(num_movies)]
+
+    with open(directory / "people.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "name", "birth"])
+        for person_id in person_ids:
+            name = f"{chooser.choice(FIRST_NAMES)} {chooser.choice(LAST_NAMES)}"
+            writer.writerow([person_id, name, chooser.choice(["", "1950", "1975"])])
+
+    with open(directory / "movies.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["id", "title", "year"])
+        for movie_id in movie_ids:
+            writer.writerow([movie_id, f"Movie, {movie_id}", chooser.choice(["", "1990", "1995", "2000", "2005"])])
+
+    # Some credits repeat, and some name people or movies that do not exist
+    credits = [
+        (chooser.choice(person_ids + ["1"]), chooser.choice(movie_ids + ["2"]))
+        for _ in range(chooser.randint(0, 2 * num_people))
+    ]
+    with open(directory / "stars.csv", "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        writer.writerows(credits)
+
+    return {(person, movie) for person, movie in credits if person != "1" and movie != "2"}
+
+
+def reference_distances(credits, source, allowed=None):
+    # Degrees from source to everyone it reaches, by breadth-first search over the credits
+    movies_of, people_in = {}, {}
+    for person, movie in credits:
+        if allowed is None or allowed(movie):
+            movies_of.setdefault(person, set()).add(movie)
+            people_in.setdefault(movie, set()).add(person)
+    distances = {source: 0}
+    frontier = deque([source])
+    while frontier:
+        person = frontier.popleft()
+        for movie in movies_of.get(person, ()):
+            for costar in people_in[movie]:
+                if costar not in distances:
+                    distances[costar] = distances[person] + 1
+                    frontier.append(costar)
+    return distances
+
+
+def check_path(path, source, target, credits, allowed=None):
+    # Every step of path is a credit shared with the previous person
+    person = source
+    for movie, costar in path:
+        assert (person, movie) in credits and (costar, movie) in credits
+        assert allowed is None or allowed(movie)
+        person = costar
+    assert person == target
+
+
+def edit_distance(a, b):
+    row = list(range(len(b) + 1))
+    for n, char in enumerate(a):
+        following = [n + 1]
+        for m, other in enumerate(b):
+            following.append(min(row[m + 1] + 1, following[m] + 1, row[m] + (char != other)))
+        row = following
+    return row[-1]
+
+
+@pytest.fixture(params=SEEDS)
+def data(tmp_path, request):
+    credits = write_data(tmp_path, request.param)
+    degrees.load_data(tmp_path, cache=False, workers=1)
+    return tmp_path, credits, random.Random(request.param)
+
+
+def test_graph_matches_credits(data):
+    _, credits, _ = data
+    graph = degrees.graph
+    for person, person_id in enumerate(degrees.person_ids):
+        movies = {degrees.movie_ids[movie] for movie in graph.movies_of(person)}
+        assert movies == {movie for other, movie in credits if other == person_id}
+        assert list(graph.movies_of(person)) == sorted(graph.movies_of(person))
+    for movie, movie_id in enumerate(degrees.movie_ids):
+        people = [degrees.person_ids[person] for person in graph.people_in(movie)]
+        assert sorted(people) == sorted({person for person, other in credits if other == movie_id})
+
+
+def test_graph_keeps_repeated_credits_once():
+    graph = Graph.from_pairs(3, 2, [0, 1, 0, 2, 0], [1, 1, 1, 0, 0])
+    assert [list(graph.movies_of(person)) for person in range(3)] == [[0, 1], [1], [0]]
+    assert [sorted(graph.people_in(movie)) for movie in range(2)] == [[0, 2], [0, 1]]
+
+
+def test_shortest_path_matches_reference(data):
+    _, credits, chooser = data
+    for _ in range(20):
+        source, target = chooser.choice(degrees.person_ids), chooser.choice(degrees.person_ids)
+        expected = reference_distances(credits, source).get(target)
+        path = degrees.shortest_path(source, target)
+        assert (None if path is None else len(path)) == expected
+        if path is not None:
+            check_path(path, source, target, credits)
+
+
+def test_tree_paths_match_reference(data):
+    _, credits, chooser = data
+    source = chooser.choice(degrees.person_ids)
+    distances = reference_distances(credits, source)
+    parents, movies = degrees.bfs_tree(source)
+    for person, person_id in enumerate(degrees.person_ids):
+        assert (parents[person] == -1) == (person_id not in distances)
+
+    # Paths from and to the source are read off its tree, walked forwards or backwards
+    for target in degrees.person_ids:
+        for path, start, end in (
+            (degrees.shortest_path(source, target), source, target),
+            (degrees.shortest_path(target, source), target, source),
+        ):
+            assert (None if path is None else len(path)) == distances.get(target)
+            if path is not None:
+                check_path(path, start, end, credits)
+
+
+def test_tree_cache_keeps_the_newest(data, monkeypatch):
+    _, _, chooser = data
+    monkeypatch.setattr(degrees, "TREE_CACHE_BYTES", 2 * 8 * degrees.graph.num_people)
+    sources = chooser.sample(degrees.person_ids, 2)
+    for source in sources + sources[:1]:
+        degrees.bfs_tree(source)
+    assert list(degrees.trees) == [degrees.person_index[sources[1]], degrees.person_index[sources[0]]]
+    degrees.bfs_tree(chooser.choice(degrees.person_ids))
+    assert len(degrees.trees) == 2
+
+
+def test_year_filters_match_reference(data):
+    _, credits, chooser = data
+    for _ in range(20):
+        first, last = chooser.choice([None, 1990, 1995, 2000]), chooser.choice([None, 1995, 2000, 2005])
+
+        def allowed(movie_id):
+            year = degrees.movies[movie_id]["year"]
+            return year.isdigit() and (first is None or int(year) >= first) and (last is None or int(year) <= last)
+
+        mask = degrees.year_mask(first, last)
+        assert [not allowed(movie_id) for movie_id in degrees.movie_ids] == list(map(bool, mask))
+
+        # Without either bound there is no filter, movies without a year included
+        if first is None and last is None:
+            allowed = None
+
+        source, target = chooser.choice(degrees.person_ids), chooser.choice(degrees.person_ids)
+        expected = reference_distances(credits, source, allowed).get(target)
+        path = degrees.shortest_path(source, target, first, last)
+        assert (None if path is None else len(path)) == expected
+        if path is not None:
+            check_path(path, source, target, credits, allowed)
+
+
+def test_path_dag_counts_every_shortest_path(data):
+    _, credits, chooser = data
+    for _ in range(10):
+        source, target = chooser.choice(degrees.person_ids), chooser.choice(degrees.person_ids)
+        distances = reference_distances(credits, source)
+
+        # Paths to each person, in order of distance, through every movie shared with the layer before
+        counts = {source: 1}
+        for person in sorted(distances, key=distances.get)[1:]:
+            counts[person] = sum(
+                counts[costar] for costar, movie in credits
+                if distances.get(costar) == distances[person] - 1 and (person, movie) in credits
+            )
+
+        paths = list(degrees.all_shortest_paths(source, target))
+        if target not in distances:
+            assert paths == [] and degrees.sample_shortest_paths(source, target, 3) is None
+            continue
+        assert len(paths) == counts[target]
+        assert len({tuple(path) for path in paths}) == len(paths)
+        for path in paths + degrees.sample_shortest_paths(source, target, 5, seed=1):
+            assert len(path) == distances[target]
+            check_path(path, source, target, credits)
+
+
+def test_snapshot_round_trip(data):
+    directory, _, _ = data
+    loaded = degrees.person_ids[:], dict(degrees.people.items()), dict(degrees.movies.items())
+    names = dict(degrees.names.items())
+    years = list(degrees.years), list(degrees.movies_by_year)
+    graph = degrees.graph
+
+    # The first load writes the snapshot, the second reads it
+    for _ in range(2):
+        degrees.load_data(directory)
+        assert (directory / degrees.SNAPSHOT).exists()
+        assert (degrees.person_ids, dict(degrees.people.items()), dict(degrees.movies.items())) == loaded
+        assert dict(degrees.names.items()) == names
+        assert (list(degrees.years), list(degrees.movies_by_year)) == years
+        assert degrees.person_index == {person_id: n for n, person_id in enumerate(degrees.person_ids)}
+        for name in ("person_offsets", "person_movies", "movie_offsets", "movie_people"):
+            assert list(getattr(degrees.graph, name)) == list(getattr(graph, name))
+
+
+@pytest.mark.parametrize("damage", ["truncated", "header", "garbage"])
+def test_damaged_snapshot_is_rebuilt(data, damage):
+    directory, credits, chooser = data
+    path = str(directory / degrees.SNAPSHOT)
+    key = snapshot.file_key([f"{directory}/{name}.csv" for name in degrees.COLUMNS]) + [degrees.SNAPSHOT_VERSION]
+    degrees.load_data(directory)
+    assert snapshot.load(path, key) is not None
+
+    with open(path, "rb") as f:
+        contents = f.read()
+    start = len(snapshot.MAGIC) + 8
+    if damage == "truncated":
+        contents = contents[:-40]
+    elif damage == "header":
+        contents = contents[:start] + b"[" + contents[start + 1:]
+    else:
+        contents = contents[:start] + bytes(chooser.randrange(256) for _ in range(len(contents) - start))
+    with open(path, "wb") as f:
+        f.write(contents)
+    assert snapshot.load(path, key) is None
+
+    # load_data reads the CSV files again and writes a good snapshot
+    degrees.load_data(directory)
+    assert snapshot.load(path, key) is not None
+    source = degrees.person_ids[0]
+    for target in degrees.person_ids:
+        found = degrees.shortest_path(source, target)
+        assert (None if found is None else len(found)) == reference_distances(credits, source).get(target)
+
+
+def test_load_data_again_replaces_everything(tmp_path):
+    first, second = tmp_path / "first", tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    write_data(first, 1)
+    credits = write_data(second, 2)
+
+    degrees.load_data(first, cache=False)
+    degrees.bfs_tree(degrees.person_ids[0])
+    degrees.year_mask(1990, None)
+    degrees.load_data(second, cache=False)
+
+    assert not degrees.trees and not degrees.year_masks
+    assert len(degrees.person_ids) == len(degrees.people) == degrees.graph.num_people
+    source = degrees.person_ids[0]
+    for target in degrees.person_ids:
+        path = degrees.shortest_path(source, target)
+        assert (None if path is None else len(path)) == reference_distances(credits, source).get(target)
+
+
+@pytest.mark.parametrize("workers", [1, 3])
+def test_blank_lines_are_skipped(tmp_path, workers):
+    clean, blank = tmp_path / "clean", tmp_path / "blank"
+    clean.mkdir()
+    blank.mkdir()
+    write_data(clean, 3)
+    for name in degrees.COLUMNS:
+        lines = (clean / f"{name}.csv").read_text(encoding="utf-8").splitlines(keepends=True)
+        lines.insert(len(lines) // 2 + 1, "\r\n")
+        (blank / f"{name}.csv").write_text("".join(lines) + "\n", encoding="utf-8")
+
+    degrees.load_data(clean, cache=False, workers=1)
+    loaded = dict(degrees.people.items()), dict(degrees.movies.items()), list(degrees.graph.movie_people)
+    degrees.load_data(blank, cache=False, workers=workers)
+    assert (dict(degrees.people.items()), dict(degrees.movies.items()), list(degrees.graph.movie_people)) == loaded
+
+
+def test_short_rows_name_their_line(tmp_path):
+    write_data(tmp_path, 4)
+    with open(tmp_path / "movies.csv", "a", encoding="utf-8") as f:
+        f.write("999\n")
+    with pytest.raises(ValueError, match=r"movies\.csv, line \d+: expected 3 fields, found 1"):
+        degrees.load_data(tmp_path, cache=False, workers=1)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_name_index_matches_brute_force(seed):
+    chooser = random.Random(seed)
+    keys = sorted({
+        "".join(chooser.choice("abc ") for _ in range(chooser.randint(1, 6)))
+        for _ in range(chooser.randint(1, 60))
+    })
+    scores = [chooser.randint(0, 5) for _ in keys]
+    index = NameIndex(keys, scores)
+
+    for _ in range(20):
+        query = "".join(chooser.choice("abcd ") for _ in range(chooser.randint(0, 4)))
+        limit = chooser.randint(1, 8)
+        best = sorted(
+            (n for n, key in enumerate(keys) if key.startswith(query)),
+            key=lambda n: (-scores[n], n)
+        )
+        assert index.complete(query, limit) == [keys[n] for n in best[:limit]]
+
+        max_distance = chooser.randint(0, 2)
+        near = sorted(
+            (edit_distance(query, key), -score, key) for key, score in zip(keys, scores)
+            if edit_distance(query, key) <= max_distance
+        )
+        expected = [(distance, key) for distance, _, key in near[:limit]]
+        assert index.fuzzy(query, max_distance, limit) == expected
+
+
+def test_landmark_bounds_hold(data):
+    directory, credits, chooser = data
+    degrees.load_landmarks(directory, count=4, cache=False)
+    for _ in range(20):
+        source, target = chooser.choice(degrees.person_ids), chooser.choice(degrees.person_ids)
+        lower, upper = degrees.approximate_degrees(source, target)
+        expected = reference_distances(credits, source).get(target)
+        if expected is None:
+            assert lower is None or upper is None
+        else:
+            assert lower <= expected and (upper is None or expected <= upper)
+
+
+def test_landmark_path_matches_reference(data):
+    directory, credits, chooser = data
+    degrees.load_landmarks(directory, count=4, cache=False)
+    for _ in range(20):
+        source, target = chooser.choice(degrees.person_ids), chooser.choice(degrees.person_ids)
+        expected = reference_distances(credits, source).get(target)
+        path = degrees.landmark_path(source, target)
+        assert (None if path is None else len(path)) == expected
+        if path is not None:
+            check_path(path, source, target, credits)
+
+
+def test_landmarks_past_the_cap(tmp_path):
+    # A chain of people, each in one movie with the next, longer than a byte of distance
+    length = 700
+    with open(tmp_path / "people.csv", "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([["id", "name", "birth"]] + [[str(n), f"Person {n}", ""] for n in range(length)])
+    with open(tmp_path / "movies.csv", "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([["id", "title", "year"]] + [[str(n), f"Movie {n}", ""] for n in range(length - 1)])
+    credits = {(str(person), str(movie)) for movie in range(length - 1) for person in (movie, movie + 1)}
+    with open(tmp_path / "stars.csv", "w", encoding="utf-8", newline="") as f:
+        csv.writer(f).writerows([["person_id", "movie_id"]] + sorted(credits))
+
+    degrees.load_data(tmp_path, cache=False)
+    degrees.load_landmarks(tmp_path, count=3, cache=False)
+    for source, target in [(0, length - 1), (10, 600), (650, 690), (length - 1, 5), (300, 301)]:
+        source, target = str(source), str(target)
+        expected = abs(int(source) - int(target))
+        lower, upper = degrees.approximate_degrees(source, target)
+        assert lower <= expected and (upper is None or expected <= upper)
+        path = degrees.landmark_path(source, target)
+        assert len(path) == expected
+        check_path(path, source, target, credits)
@@ -0,0 +1,47 @@
+import random
+
+import pytest
+
+import degrees
+import report
+from landmarks import CAPPED, UNREACHED
+from test_degrees import reference_distances, write_data
+
+pytest.importorskip("numpy")
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_distance_matrix_matches_reference(tmp_path, seed):
+    credits = write_data(tmp_path, seed)
+    degrees.load_data(tmp_path, cache=False)
+
+    # More sources than one batch holds, some of them repeated
+    chooser = random.Random(seed)
+    sources = [chooser.choice(degrees.person_ids) for _ in range(report.BATCH + 10)]
+    distances = report.distance_matrix([degrees.person_index[source] for source in sources])
+    assert distances.shape == (len(sources), len(degrees.person_ids))
+    for source, row in zip(sources, distances):
+        reached = reference_distances(credits, source)
+        expected = [reached.get(person_id, UNREACHED) for person_id in degrees.person_ids]
+        assert row.tolist() == expected
+
+        summary = report.summary(row)
+        assert summary["reached"] == len(reached)
+        assert summary["eccentricity"] == max(reached.values())
+        assert summary["histogram"] == [list(reached.values()).count(n) for n in range(summary["eccentricity"] + 1)]
+
+
+def test_distance_matrix_caps_long_distances(tmp_path):
+    # A chain of people, each in one movie with the next
+    length = 300
+    (tmp_path / "people.csv").write_text("id,name,birth\n" + "".join(f"{n},Person {n},\n" for n in range(length)))
+    (tmp_path / "movies.csv").write_text("id,title,year\n" + "".join(f"{n},Movie {n},\n" for n in range(length - 1)))
+    (tmp_path / "stars.csv").write_text("person_id,movie_id\n" + "".join(
+        f"{person},{movie}\n" for movie in range(length - 1) for person in (movie, movie + 1)
+    ))
+    degrees.load_data(tmp_path, cache=False)
+
+    distances = report.distance_matrix([degrees.person_index["0"], degrees.person_index["150"]])
+    ids = [int(person_id) for person_id in degrees.person_ids]
+    assert distances[0].tolist() == [min(n, CAPPED) for n in ids]
+    assert distances[1].tolist() == [abs(n - 150) for n in ids]
@@ -0,0 +1,88 @@
+import asyncio
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+import degrees
+import server
+
+SMALL = os.path.join(os.path.dirname(os.path.abspath(__file__)), "small")
+
+
+def serve(queries, answer=None, fail_writes=False, workers=4):
+    """
+    Runs serve_lines over queries with a thread pool and returns the
+    replies, decoded, in the order they were written.
+    """
+    replies = []
+    queries = iter(queries)
+
+    async def lines():
+        return next(queries, None)
+
+    async def write(text):
+        await asyncio.sleep(0)
+        if fail_writes:
+            raise ConnectionResetError("the client went away")
+        replies.append(json.loads(text))
+
+    with ThreadPoolExecutor(workers) as pool:
+        asyncio.run(server.serve_lines(lines, write, pool))
+    return replies
+
+
+@pytest.fixture(scope="module", autouse=True)
+def data():
+    degrees.load_data(SMALL, cache=False)
+
+
+def test_answers_every_query():
+    queries = ["Kevin Bacon,Tom Hanks", "102,129", "  ", "Nobody,Tom Hanks", "just one field"]
+    replies = {reply["query"]: reply for reply in serve(queries)}
+    assert sorted(replies) == sorted(query for query in queries if query.strip())
+
+    assert replies["Kevin Bacon,Tom Hanks"]["degrees"] == 1
+    assert replies["Kevin Bacon,Tom Hanks"]["path"] == [["112384", "158"]]
+    assert replies["102,129"]["degrees"] == len(degrees.shortest_path("102", "129"))
+    assert replies["Nobody,Tom Hanks"]["error"] == "'Nobody' not found"
+    assert replies["just one field"]["error"] == "expected source,target"
+
+
+def test_failed_queries_get_an_error_reply(monkeypatch):
+    def answer(line):
+        if line == "bad":
+            raise RuntimeError("worker broke")
+        return {"query": line}
+
+    monkeypatch.setattr(server, "answer", answer)
+    replies = serve(["good", "bad", "good"])
+    assert sorted(map(json.dumps, replies)) == sorted(map(json.dumps, [
+        {"query": "good"}, {"query": "bad", "error": "RuntimeError: worker broke"}, {"query": "good"},
+    ]))
+
+
+def test_lost_clients_are_ignored():
+    assert serve(["Kevin Bacon,Tom Hanks"] * 5, fail_writes=True) == []
+
+
+def test_pending_queries_are_capped(monkeypatch):
+    lock = threading.Lock()
+    running = [0, 0] # now, most at once
+
+    def answer(line):
+        with lock:
+            running[0] += 1
+            running[1] = max(running)
+        time.sleep(0.01)
+        with lock:
+            running[0] -= 1
+        return {"query": line}
+
+    monkeypatch.setattr(server, "answer", answer)
+    monkeypatch.setattr(server, "MAX_PENDING", 3)
+    assert len(serve([str(n) for n in range(30)], workers=10)) == 30
+    assert 1 < running[1] <= 3
@@ -0,0 +1,36 @@
+import random
+from collections import deque
+
+import pytest
+
+from util import Node, QueueFrontier, StackFrontier
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("kind", [StackFrontier, QueueFrontier])
+def test_frontiers_match_a_list(seed, kind):
+    chooser = random.Random(seed)
+    frontier = kind()
+    reference = deque()
+    for _ in range(200):
+        if reference and chooser.random() < 0.4:
+            expected = reference.pop() if kind is StackFrontier else reference.popleft()
+            assert frontier.remove() is expected
+        else:
+            node = Node(chooser.randrange(10), None, None)
+            frontier.add(node)
+            reference.append(node)
+
+        # Repeated states stay contained until their last node leaves
+        for state in range(10):
+            assert frontier.contains_state(state) == any(node.state == state for node in reference)
+        assert frontier.empty() == (not reference)
+
+
+@pytest.mark.parametrize("kind", [StackFrontier, QueueFrontier])
+def test_empty_frontier_raises(kind):
+    frontier = kind()
+    frontier.add(Node("a", None, None))
+    frontier.remove()
+    with pytest.raises(Exception, match="empty frontier"):
+        frontier.remove()
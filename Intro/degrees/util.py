@@ -1,6 +1,9 @@
 import csv
+from collections import deque
 
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -9,13 +12,15 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        self.index = {} # state -> number of queued nodes with that state
 
     def add(self, node):
         self.frontier.append(node)
+        self.index[node.state] = self.index.get(node.state, 0) + 1
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.index
 
     def empty(self):
         return len(self.frontier) == 0
@@ -24,10 +29,18 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.forget(node)
             return node
 
+    def forget(self, node):
+        # drop a node that left the frontier from the state index
+        count = self.index[node.state] - 1
+        if count == 0:
+            del self.index[node.state]
+        else:
+            self.index[node.state] = count
+
 
 class QueueFrontier(StackFrontier):
 
@@ -35,6 +48,25 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.forget(node)
             return node
+
+
+def trace(parents, actions, state, backwards=False):
+    """
+    Returns the (action, state) steps from the root of a search tree to
+    state, or with backwards, from state back up to the root.
+
+    parents and actions map every state but the root, which is its own
+    parent, to the state and the action it was reached from;
+    dictionaries and arrays both work.
+    """
+    path = []
+    while parents[state] != state:
+        parent = parents[state]
+        path.append((actions[state], parent if backwards else state))
+        state = parent
+    if not backwards:
+        path.reverse()
+    return path
@@ -0,0 +1,345 @@
+import heapq
+import random
+
+import pytest
+
+import Maze
+from Maze import DStarLite, HierarchicalIndex, line_chunks, maze, solve_files
+
+SEEDS = range(150)
+
+
+def random_maze(path, chooser, cells="#   ", height=None, width=None):
+    """Writes a random maze with one A and one B to path and returns its rows."""
+    height = height or chooser.randint(1, 20)
+    width = width or chooser.randint(2, 20)
+    rows = [[chooser.choice(cells) for _ in range(width)] for _ in range(height)]
+    (ai, aj), (bi, bj) = chooser.sample([(i, j) for i in range(height) for j in range(width)], 2)
+    rows[ai][aj] = "A"
+    rows[bi][bj] = "B"
+    path.write_text("\n".join("".join(row) for row in rows))
+    return rows
+
+
+def reference_cost(rows, start, goal):
+    # Dijkstra with a heap over the text rows, None if the goal is not reachable
+    def cost(cell):
+        char = rows[cell[0]][cell[1]]
+        return int(char) if char.isdigit() else 1
+
+    best = {start: 0}
+    frontier = [(0, start)]
+    while frontier:
+        distance, cell = heapq.heappop(frontier)
+        if cell == goal:
+            return distance
+        if distance > best[cell]:
+            continue
+        for di, dj in ((-1, 0), (1, 0), (0, -1), (0, 1)):
+            i, j = cell[0] + di, cell[1] + dj
+            if 0 <= i < len(rows) and 0 <= j < len(rows[0]) and rows[i][j] != "#":
+                following = distance + cost((i, j))
+                if following < best.get((i, j), following + 1):
+                    best[(i, j)] = following
+                    heapq.heappush(frontier, (following, (i, j)))
+    return None
+
+
+def solution_length(m, solve):
+    # Number of steps of the path solve finds, checking it is a path, None if there is none
+    try:
+        solve()
+    except Exception as e:
+        assert str(e) == "no solution"
+        return None
+    previous = m.start
+    for cell in m.solution[1]:
+        assert abs(cell[0] - previous[0]) + abs(cell[1] - previous[1]) == 1
+        assert not m.is_wall(*cell)
+        previous = cell
+    assert previous == m.goal
+    return len(m.solution[1])
+
+
+@pytest.mark.parametrize("seed", range(50))
+def test_line_chunks_split_like_splitlines(seed):
+    chooser = random.Random(seed)
+    data = b"".join(chooser.choice([b"#", b" ", b"A", b"\r", b"\n", b"\r\n"]) for _ in range(chooser.randint(0, 60)))
+    for size in range(1, 9):
+        assert [line for lines in line_chunks(data, size) for line in lines] == data.splitlines()
+
+
+@pytest.mark.parametrize("text", [
+    "#A #\r\n#  #\r\n# B#\r\n",
+    "#A #\r#  #\r# B#",
+    "#A\n#  ##\n\n B",
+    "#A é#\n#\u2028 B",
+    "A\x0c#B\n",
+])
+@pytest.mark.parametrize("size", [1, 3, 1 << 20])
+def test_load_reads_walls_like_text(tmp_path, monkeypatch, text, size):
+    monkeypatch.setattr(Maze.line_chunks, "__defaults__", (size,))
+    (tmp_path / "maze.txt").write_bytes(text.encode("utf-8"))
+    m = maze(tmp_path / "maze.txt")
+
+    # Lines as str.splitlines ends them, one cell per character, open past a line's end
+    lines = text.splitlines()
+    width = max(map(len, lines))
+    assert (m.height, m.width) == (len(lines), width)
+    assert [[m.is_wall(i, j) for j in range(width)] for i in range(len(lines))] == [
+        [char not in " AB" for char in line.ljust(width)] for line in lines
+    ]
+    assert lines[m.start[0]][m.start[1]] == "A" and lines[m.goal[0]][m.goal[1]] == "B"
+
+
+@pytest.mark.parametrize("seed", range(10))
+@pytest.mark.parametrize("show_solution, show_explored", [(True, True), (True, False), (False, True)])
+def test_output_image_paints_every_cell(tmp_path, seed, show_solution, show_explored):
+    from PIL import Image
+
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, random.Random(seed))
+    m = maze(filename)
+    try:
+        m.solve("bfs")
+    except Exception:
+        m.solution = None
+    cell_size, cell_border = 7, 2
+    m.output_image(tmp_path / "maze.png", show_solution, show_explored, cell_size, cell_border)
+
+    image = Image.open(tmp_path / "maze.png").convert("RGB")
+    assert image.size == (m.width * cell_size, m.height * cell_size)
+    solution = set(m.solution[1]) if show_solution and m.solution is not None else set()
+    for i in range(m.height):
+        for j in range(m.width):
+            # Later layers paint over earlier ones, like the original renderer drew them
+            background = (40, 40, 40) if m.is_wall(i, j) else (0, 0, 0)
+            inside = background
+            if (i, j) == m.start:
+                inside = (255, 0, 0)
+            if (i, j) == m.goal:
+                inside = (0, 171, 28)
+            if (i, j) in solution:
+                inside = (220, 235, 113)
+            if show_explored and m.explored[m.cell_id((i, j))]:
+                inside = (212, 97, 85)
+            x, y = j * cell_size, i * cell_size
+            assert image.getpixel((x, y)) == background
+            assert image.getpixel((x + cell_size // 2, y + cell_size // 2)) == inside
+
+
+def reference_print(m, every):
+    # The original maze.print, one character at a time, with every added
+    solution = m.solution[1]
+    lines = [str(m.solution), ""]
+    for x in range(0, len(solution), every):
+        lines.append(f"Step {x + 1}: ")
+        for i in range(m.height):
+            row = ""
+            for j in range(m.width):
+                if m.is_wall(i, j):
+                    row += "█"
+                elif (i, j) == m.start:
+                    row += "A"
+                elif (i, j) == m.goal and x != len(solution) - 1:
+                    row += "B"
+                elif (i, j) in solution and solution.index((i, j)) == x:
+                    row += "*"
+                else:
+                    row += " "
+            lines.append(row)
+        lines.append("")
+    lines += ["Solution: ", ""]
+    for i in range(m.height):
+        row = ""
+        for j in range(m.width):
+            if m.is_wall(i, j):
+                row += "█"
+            elif (i, j) == m.start:
+                row += "A"
+            elif (i, j) == m.goal:
+                row += "B"
+            elif (i, j) in solution:
+                row += "*"
+            else:
+                row += " "
+        lines.append(row)
+    lines += ["", f"{m.num_explored} steps"]
+    return "\n".join(lines) + "\n"
+
+
+@pytest.mark.parametrize("seed", range(30))
+@pytest.mark.parametrize("every", [1, 3])
+def test_print_matches_original(tmp_path, capsys, seed, every):
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, random.Random(seed))
+    m = maze(filename)
+    try:
+        m.solve("bfs")
+    except Exception:
+        return
+    m.print(every)
+    assert capsys.readouterr().out == reference_print(m, every)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_bidirectional_matches_bfs(tmp_path, seed):
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, random.Random(seed))
+    expected = solution_length(m := maze(filename), lambda: m.solve("bfs"))
+    m = maze(filename)
+    assert solution_length(m, lambda: m.solve("bidirectional")) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_jps_matches_bfs(tmp_path, seed):
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, random.Random(seed))
+    expected = solution_length(m := maze(filename), lambda: m.solve("bfs"))
+    m = maze(filename)
+    assert solution_length(m, lambda: m.solve("jps")) == expected
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_path_from_matches_bfs(tmp_path, seed):
+    chooser = random.Random(seed)
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, chooser)
+    m = maze(filename)
+    open_cells = [(i, j) for i in range(m.height) for j in range(m.width) if not m.is_wall(i, j)]
+    for start in chooser.sample(open_cells, min(5, len(open_cells))):
+        fresh = maze(filename)
+        fresh.start = start
+        expected = solution_length(fresh, lambda: fresh.solve("bfs")) if start != m.goal else 0
+        m.start = start
+        assert solution_length(m, lambda: setattr(m, "solution", m.path_from(start))) == expected
+
+    # Several goals at once are as near as the nearest of them
+    goals = chooser.sample(open_cells, min(3, len(open_cells)))
+    together = m.distance_field(goals)
+    apart = [m.distance_field(goal) for goal in goals]
+    for cell in range(m.size):
+        reached = [distances[cell] for distances in apart if distances[cell] != -1]
+        assert together[cell] == min(reached, default=-1)
+
+
+def test_distance_fields_are_dropped(tmp_path):
+    (tmp_path / "maze.txt").write_text("A   \n### \nB   ")
+    m = maze(tmp_path / "maze.txt")
+    assert len(m.path_from(m.start)[1]) == 8
+    m.set_wall((1, 1), False)
+    assert not m.distance_fields
+    assert len(m.path_from(m.start)[1]) == 4
+
+    # Only the goal sets used last are kept
+    cells = [(0, j) for j in range(4)] + [(2, j) for j in range(4)]
+    for goal in cells:
+        m.distance_field(goal)
+    m.distance_field(cells[-2])
+    assert len(m.distance_fields) == Maze.DISTANCE_FIELDS
+    assert list(m.distance_fields)[-1] == (m.cell_id(cells[-2]),)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_dstar_lite_matches_bfs_after_edits(tmp_path, seed):
+    chooser = random.Random(seed)
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, chooser)
+    m = maze(filename)
+    planner = DStarLite(m)
+    for _ in range(10):
+        fresh = maze(filename)
+        fresh.walls = bytearray(m.walls)
+        assert solution_length(m, planner.plan) == solution_length(fresh, lambda: fresh.solve("bfs"))
+
+        for _ in range(chooser.randint(1, 3)):
+            cell = (chooser.randrange(m.height), chooser.randrange(m.width))
+            if cell not in (m.start, m.goal):
+                planner.set_wall(cell, chooser.random() < 0.5)
+
+
+@pytest.mark.parametrize("seed", SEEDS)
+def test_weighted_searches_match_heap_dijkstra(tmp_path, seed):
+    filename = tmp_path / "maze.txt"
+    rows = random_maze(filename, random.Random(seed), cells="#   123456789")
+    m = maze(filename)
+    expected = reference_cost(rows, m.start, m.goal)
+    for algorithm in ("dijkstra", "astar"):
+        m = maze(filename)
+        cost = None if solution_length(m, lambda: m.solve(algorithm)) is None else m.solution_cost()
+        assert cost == expected, algorithm
+
+
+def test_step_planners_refuse_move_costs(tmp_path):
+    filename = tmp_path / "maze.txt"
+    filename.write_text("A99\n9B\n11")
+    m = maze(filename)
+    for plan in (lambda: m.path_from(m.start), lambda: DStarLite(m), lambda: HierarchicalIndex(m)):
+        with pytest.raises(ValueError):
+            plan()
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_hierarchical_index_paths_and_files(tmp_path, seed):
+    chooser = random.Random(seed)
+    filename = tmp_path / "maze.txt"
+    random_maze(filename, chooser, height=chooser.randint(10, 40), width=chooser.randint(10, 40))
+    m = maze(filename)
+    index = HierarchicalIndex(m, cluster_size=4)
+    found = solution_length(m, index.path)
+    expected = solution_length(fresh := maze(filename), lambda: fresh.solve("bfs"))
+    assert (found is None) == (expected is None)
+    if found is not None:
+        assert found >= expected
+
+    # Saved and loaded back it is the same index, but only for the same walls
+    index.save(tmp_path / "maze.hpa")
+    loaded = HierarchicalIndex.load(tmp_path / "maze.hpa", m)
+    for name in ("nodes", "offsets", "targets", "costs"):
+        assert getattr(loaded, name) == getattr(index, name)
+    cell = next((i, j) for i in range(m.height) for j in range(m.width) if (i, j) not in (m.start, m.goal))
+    m.set_wall(cell, not m.is_wall(*cell))
+    with pytest.raises(Exception, match="walls changed"):
+        index.path()
+    with pytest.raises(Exception, match="different maze"):
+        HierarchicalIndex.load(tmp_path / "maze.hpa", m)
+
+
+def test_solve_files_reports_every_maze(tmp_path):
+    filenames = []
+    for seed in range(6):
+        filenames.append(str(tmp_path / f"maze{seed}.txt"))
+        random_maze(tmp_path / f"maze{seed}.txt", random.Random(seed))
+    filenames.append(str(tmp_path / "missing.txt"))
+
+    results = {result["file"]: result for result in solve_files(filenames, workers=2)}
+    assert sorted(results) == sorted(filenames)
+    for filename in filenames[:-1]:
+        expected = solution_length(m := maze(filename), lambda: m.solve("bfs"))
+        result = results[filename]
+        assert result["status"] == ("no solution" if expected is None else "solved")
+        assert result.get("path_length") == expected
+    assert results[filenames[-1]]["status"] == "error"
+
+
+def test_solve_files_replaces_timed_out_workers(tmp_path):
+    # An open maze big enough that BFS takes far longer than the timeout
+    size = 1500
+    rows = [" " * size] * size
+    rows[0] = "A" + rows[0][1:]
+    rows[-1] = rows[-1][:-1] + "B"
+    (tmp_path / "big.txt").write_text("\n".join(rows))
+    random_maze(tmp_path / "small.txt", random.Random(1))
+    filenames = [str(tmp_path / "big.txt"), str(tmp_path / "small.txt"), str(tmp_path / "small.txt")]
+
+    results = list(solve_files(filenames, workers=1, timeout=0.5))
+    assert [result["status"] for result in results][0] == "timeout"
+    assert results[0]["file"] == filenames[0] and results[0]["seconds"] >= 0.5
+    expected = solution_length(m := maze(filenames[1]), lambda: m.solve("bfs"))
+    for result in results[1:]:
+        assert result["file"] == filenames[1] and result.get("path_length") == expected
+
+
+def test_solve_files_needs_a_worker():
+    with pytest.raises(ValueError):
+        next(solve_files(["maze1.txt"], workers=0))